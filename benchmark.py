@@ -0,0 +1,188 @@
+"""
+Benchmark suite of the board operations, at the game levels and at scaled-up custom sizes. All the boards are placed
+with a fixed seed, so the numbers are comparable between commits. The headless board states (BoardState and
+BitBoardState) are always measured; the Board and CanvasBoard widgets are measured too when a display is available
+(e.g. under a virtual display: root> xvfb-run python benchmark.py). The results are written to a json file:
+root> python benchmark.py --output benchmark.json
+"""
+import argparse
+import json
+import platform
+import statistics
+from time import perf_counter
+
+import tkinter as tk
+
+from bitboard import BitBoardState
+from board import Board, CanvasBoard
+from rules import LEVELS
+from state import BoardState
+
+SIZES = {level: params for level, params in LEVELS.items()}
+# the custom sizes keep the mines density of the hard level
+SIZES.update({f'{n}x{n}': dict(rows=n, columns=n, n_mines=n * n * 99 // 576) for n in (64, 256)})
+
+
+def measure(action, setup=lambda: None, teardown=lambda arg: None, repeat: int = 5, number: int = 1) -> dict:
+    """
+    Time an action, repeat times. Each time the setup is called first (untimed), and its result is passed to the
+    action, which is called number times in a row, and then to the teardown (untimed).
+
+    :return: the minimal and the median time of a single call, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        tic = perf_counter()
+        for _ in range(number):
+            action(arg)
+        times.append((perf_counter() - tic) / number)
+        teardown(arg)
+    return dict(min=min(times), median=statistics.median(times))
+
+
+def started(params: dict, seed: int, first: bool = True, backend=BoardState) -> BoardState:
+    """
+    Return a board state with its mines placed, and with its center cell opened unless first is False.
+    """
+    model = backend(**params, seed=seed)
+    model.place_mines(model.size // 2)
+    if first:
+        model.reveal(model.size // 2)
+    return model
+
+
+def closed_hint(model: BoardState) -> int:
+    """
+    Return the first closed cell which isn't a mine and shows a hint, so opening it opens only itself.
+    """
+    return next(index for index in range(model.size)
+                if not model.opened[index] and not model.mines[index] and model.counts[index])
+
+
+def with_target(board) -> tuple:
+    """
+    Return a started board (or board state) together with its first closed hint cell, as the setup of the single
+    cell actions.
+    """
+    return board, closed_hint(getattr(board, 'model', board))
+
+
+def bench_state(params: dict, seed: int, repeat: int, backend=BoardState) -> dict:
+    """
+    Time the operations of a headless board-state backend.
+    """
+    empty = dict(params, n_mines=0)
+    return dict(
+        construction=measure(lambda _: backend(**params, seed=seed), repeat=repeat),
+        start=measure(lambda model: model.place_mines(model.size // 2),
+                      lambda: backend(**params, seed=seed), repeat=repeat),
+        onclick=measure(lambda target: target[0].reveal(target[1]),
+                        lambda: with_target(started(params, seed, backend=backend)), repeat=repeat),
+        flood_fill=measure(lambda model: model.reveal(0), lambda: started(empty, seed, False, backend), repeat=repeat),
+        win=measure(lambda model: model.won(), lambda: started(params, seed, backend=backend), repeat=repeat,
+                    number=1000),
+        flag=measure(lambda target: target[0].toggle_flag(target[1]),
+                     lambda: with_target(started(params, seed, backend=backend)), repeat=repeat),
+    )
+
+
+class BenchRoot(tk.Tk):
+    """
+    A bare root window for the board views: it holds the flags counter like Game does, but has no clock and no game
+    over, so the measured actions are the board's own.
+    """
+    def __init__(self):
+        super(BenchRoot, self).__init__()
+        self.flags = tk.IntVar(self)
+
+    def tic(self):
+        pass
+
+    def over(self):
+        pass
+
+
+def bench_view(root: tk.Tk, view, params: dict, seed: int, repeat: int) -> dict:
+    """
+    Time the operations of a board view, each one with all the pending drawing done.
+    """
+    def build(board_params: dict, first: bool = None):
+        board = view(master=root, seed=seed, **board_params)
+        board.grid(row=1)
+        if first is not None:
+            board.model.place_mines(board.model.size // 2)
+            board.bind_actions()
+            if first:
+                board.reveal(board.model.size // 2)
+        root.update_idletasks()
+        return board
+
+    def timed(action):
+        def run(board):
+            action(board)
+            root.update_idletasks()
+        return run
+
+    def destroy(board):
+        board.destroy()
+
+    def destroy_target(target: tuple):
+        target[0].destroy()
+
+    def destroy_built(built: list):
+        for board in built:
+            board.destroy()
+
+    empty = dict(params, n_mines=0)
+    return dict(
+        construction=measure(lambda built: built.append(build(params)), list, destroy_built, repeat=repeat),
+        start=measure(timed(lambda board: board.begin(board.model.size // 2)), lambda: build(params), destroy,
+                      repeat=repeat),
+        onclick=measure(timed(lambda target: target[0].reveal(target[1])), lambda: with_target(build(params, True)),
+                        destroy_target, repeat=repeat),
+        flood_fill=measure(timed(lambda board: board.reveal(0)), lambda: build(empty, False), destroy, repeat=repeat),
+        win=measure(lambda board: board.win(), lambda: build(params, True), destroy, repeat=repeat, number=1000),
+        flag=measure(timed(lambda target: target[0].toggle_flag(target[1])), lambda: with_target(build(params, True)),
+                     destroy_target, repeat=repeat),
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark the board operations.')
+    parser.add_argument('--sizes', nargs='+', choices=tuple(SIZES), default=tuple(SIZES))
+    parser.add_argument('--seed', type=int, default=2021)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='benchmark.json')
+    args = parser.parse_args(args)
+
+    try:
+        root = BenchRoot()
+        root.withdraw()
+    except tk.TclError:
+        root = None
+        print('No display: only the headless board state is measured')
+
+    results = {}
+    for size in args.sizes:
+        params = SIZES[size]
+        results[size] = {'state': bench_state(params, args.seed, args.repeat),
+                         'bits': bench_state(params, args.seed, args.repeat, BitBoardState)}
+        if root is not None:
+            # large label boards take too long to be measured repeatedly
+            label_repeat = args.repeat if params['rows'] * params['columns'] <= 64 * 64 else 1
+            results[size]['labels'] = bench_view(root, Board, params, args.seed, label_repeat)
+            results[size]['canvas'] = bench_view(root, CanvasBoard, params, args.seed, args.repeat)
+        for target, operations in results[size].items():
+            for operation, times in operations.items():
+                print(f'{size:>8} {target:>7} {operation:>13}: {times["median"] * 1e6:12.1f} us')
+
+    if root is not None:
+        root.destroy()
+    with open(args.output, 'w') as fp:
+        json.dump(dict(python=platform.python_version(), platform=platform.platform(), seed=args.seed,
+                       repeat=args.repeat, results=results), fp, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+from random import Random, randrange
+
+from state import BoardState, adjacency
+
+# the translation of the binary digits of a board to a flat array of its cells
+BYTES = bytes.maketrans(b'01', b'\0\1')
+
+
+class Bits:
+    """
+    A read-only sequence view of one of the bitboards of a BitBoardState, so the code that reads the cells one by one
+    (the board views, the solver) works with both board-state backends.
+    """
+    def __init__(self, model: 'BitBoardState', name: str):
+        self.model = model
+        self.name = name
+
+    def __getitem__(self, index: int) -> int:
+        return getattr(self.model, self.name) >> index & 1
+
+    def __len__(self) -> int:
+        return self.model.size
+
+
+class BitBoardState:
+    """
+    The BitBoardState class is a board-state backend with the interface of BoardState, in which the mines, the opened
+    cells and the flagged cells are each a single Python integer, one bit per cell (bit index = flat index of the
+    cell). The whole board moves by shifts: a shift by one column (masked at the board edges) or by one row gives the
+    neighbors in one direction of every cell at once. So the neighboring-mines hints are a bit-sliced sum of the 8
+    shifted mine boards, the zero-region expansion is a repeated dilation, and a win is a single comparison.
+
+    A snapshot of the game is a handful of integers, so copying the state for undo, a solver or a simulation costs
+    almost nothing.
+    """
+    # the cell addressing and the mines sampling are shared with BoardState, so a seed gives the same board on both
+    index = BoardState.index
+    loc = BoardState.loc
+    neighbors = BoardState.neighbors
+    flags_around = BoardState.flags_around
+    chord = BoardState.chord
+    safe_zone = BoardState.safe_zone
+    sample_mines = BoardState.sample_mines
+    ATTEMPTS = BoardState.ATTEMPTS
+
+    def __init__(self, rows: int, columns: int, n_mines: int, seed: int = None, safe_radius: int = 0,
+                 min_3bv: int = 0):
+        if not 0 <= n_mines < rows * columns:
+            raise ValueError(f'a {rows}x{columns} board cannot hold {n_mines} mines')
+        self.rows = rows
+        self.columns = columns
+        self.n_mines = n_mines
+        self.size = rows * columns
+        self.seed = randrange(2 ** 32) if seed is None else seed
+        self.safe_radius = safe_radius
+        self.min_3bv = min_3bv
+        self.offsets, self.adjacent = adjacency(rows, columns)
+
+        self.full = (1 << self.size) - 1
+        # the board without its first and without its last column, to mask the wrapping of the column shifts
+        first_column = sum(1 << start for start in range(0, self.size, columns))
+        self.not_first = self.full & ~first_column
+        self.not_last = self.full & ~(first_column << (columns - 1))
+
+        self.mine_bits = 0
+        self.open_bits = 0
+        self.flag_bits = 0
+        self.safe_bits = self.full
+        self.zero_bits = self.full
+        self.counts = bytearray(self.size)
+        self.labels = None
+        self.regions = []
+        self.bbbv = 0
+        self.started = False
+        self.lost = False
+
+        self.mines = Bits(self, 'mine_bits')
+        self.opened = Bits(self, 'open_bits')
+        self.flagged = Bits(self, 'flag_bits')
+
+    def shifts(self, bits: int) -> list[int]:
+        """
+        Return the 8 boards of the neighbors of the given board: bit i of each is set if its neighbor of cell i in one
+        of the directions is set.
+        """
+        columns, full = self.columns, self.full
+        left = (bits << 1) & self.not_first
+        right = (bits >> 1) & self.not_last
+        return [left, right,
+                (bits << columns) & full, bits >> columns,
+                (left << columns) & full, left >> columns,
+                (right << columns) & full, right >> columns]
+
+    def dilate(self, bits: int) -> int:
+        """
+        Return the board of all the cells which are set or have a set neighbor.
+        """
+        columns = self.columns
+        row = bits | ((bits << 1) & self.not_first) | ((bits >> 1) & self.not_last)
+        return (row | (row << columns) | (row >> columns)) & self.full
+
+    def mine_indices(self) -> list[int]:
+        """
+        Return the flat indices of all the mines on the board
+        """
+        return self.indices(self.mine_bits)
+
+    @staticmethod
+    def indices(bits: int) -> list[int]:
+        """
+        Return the flat indices of the set cells of a board.
+        """
+        digits = bin(bits)[:1:-1]
+        indices = []
+        index = digits.find('1')
+        while index != -1:
+            indices.append(index)
+            index = digits.find('1', index + 1)
+        return indices
+
+    def place_mines(self, first: int) -> None:
+        """
+        Set the mine locations, keeping the safe zone around the first opened cell clear, count the neighboring mines
+        of every cell and label the opening regions (for the 3BV). A layout with a 3BV under the minimum is rolled
+        again, up to ATTEMPTS layouts, and the last one is kept.
+        """
+        for attempt in range(self.ATTEMPTS):
+            if attempt:
+                self.mine_bits = 0
+                self.seed = Random(self.seed).randrange(2 ** 32)
+            for index in self.sample_mines(first):
+                self.mine_bits |= 1 << index
+            self.count_mines()
+            self.label_regions()
+            if self.bbbv >= self.min_3bv:
+                break
+        self.started = True
+
+    def count_mines(self) -> None:
+        """
+        Compute the neighboring-mines hint of every cell at once: the 8 shifted mine boards are summed by bit-sliced
+        adders into 4 boards of the binary digits of the hints.
+        """
+        planes = [0, 0, 0, 0]
+        for carry in self.shifts(self.mine_bits):
+            for digit in range(4):
+                planes[digit], carry = planes[digit] ^ carry, planes[digit] & carry
+
+        counts = bytearray(self.size)
+        for digit, plane in enumerate(planes):
+            weights = bytes.maketrans(b'01', bytes((0, 1 << digit)))
+            digits = bin(plane)[:1:-1].ljust(self.size, '0').encode().translate(weights)
+            counts = bytearray(map(sum, zip(counts, digits)))
+        self.counts = counts
+        self.safe_bits = self.full & ~self.mine_bits
+        self.zero_bits = self.safe_bits & ~self.dilate(self.mine_bits)
+
+    def label_regions(self) -> None:
+        """
+        Label the opening regions and count the 3BV as BoardState does, over a flat copy of the mines board (reading
+        the mines bit by bit from the integer takes a time by the board size for every cell).
+        """
+        digits = bin(self.mine_bits)[:1:-1].ljust(self.size, '0').encode()
+        BoardState.label_regions(self, digits.translate(BYTES))
+
+    @property
+    def n_flags(self) -> int:
+        return bin(self.flag_bits).count('1')
+
+    @property
+    def closed_safe(self) -> int:
+        return bin(self.safe_bits & ~self.open_bits).count('1')
+
+    def toggle_flag(self, index: int):
+        """
+        Flag or de-flag a closed cell. Return the new flag state of the cell, or None if the cell is already opened.
+        """
+        bit = 1 << index
+        if self.open_bits & bit:
+            return None
+        self.flag_bits ^= bit
+        return bool(self.flag_bits & bit)
+
+    def reveal(self, index: int) -> list[int]:
+        """
+        Open a closed, unflagged cell. If the cell is a mine the game is lost; if no mines surround it, the region of
+        the empty cells connected to it is grown by dilations until it stops growing, and is opened with its border.
+
+        :return: list of the indices of the cells that were opened by this action.
+        """
+        bit = 1 << index
+        if (self.open_bits | self.flag_bits) & bit:
+            return []
+
+        if self.mine_bits & bit:
+            self.open_bits |= bit
+            self.lost = True
+            return [index]
+
+        closed = self.full & ~self.open_bits & ~self.flag_bits
+        region = bit
+        if self.zero_bits & bit:
+            zeros = self.zero_bits & closed
+            while True:
+                grown = self.dilate(region) & zeros
+                if grown == region:
+                    break
+                region = grown
+            region = self.dilate(region) & closed
+        self.open_bits |= region
+        return self.indices(region)
+
+    def close(self, cells) -> None:
+        """
+        Close opened cells again, to undo the action that opened them. Closing an opened mine takes the lose back.
+        """
+        bits = sum(1 << index for index in cells)
+        self.open_bits &= ~bits
+        if bits & self.mine_bits:
+            self.lost = False
+
+    def won(self) -> bool:
+        """
+        check if all the cells that aren't mines were opened
+        """
+        return not self.lost and self.open_bits & self.safe_bits == self.safe_bits
+
+    def snapshot(self) -> tuple:
+        """
+        Return the whole state of the game, as a tuple of integers.
+        """
+        return self.mine_bits, self.open_bits, self.flag_bits, self.lost
+
+    def restore(self, snapshot: tuple) -> None:
+        """
+        Set the state of the game back to a snapshot.
+        """
+        mine_bits, self.open_bits, self.flag_bits, self.lost = snapshot
+        if mine_bits != self.mine_bits:
+            self.mine_bits = mine_bits
+            self.count_mines()
+            self.label_regions()
+        self.started = True
+
+
+# the board-state backends by name
+BACKENDS = {'arrays': BoardState, 'bits': BitBoardState}
@@ -1,141 +1,506 @@
-from random import randrange
-import tkinter as tk
-from tkinter import ttk
-
-class Board(ttk.Frame):
-    """
-    The Board class define a single game board with specific number of rows, columns & mines. Each board has 2
-    initializations: First the GUI initialization, in which the board parameters assigned and a grid of cells (defined
-    as ttk.Labels) are formed and placed. Second initialization happened after the first click of a user on any cell,
-    which set the mines location, binds all cells to the user actions.
-    """
-    # define the labels colors for neighboring hint
-    COLORS = (None, 'blue', 'green', 'red', 'purple', 'brown', 'cyan', 'black', 'gray')
-
-    def __init__(self, rows: int, columns: int, n_mines: int, master: tk.Tk = None):
-        super(Board, self).__init__(master)
-        self.rows = rows
-        self.columns = columns
-        self.n_mines = n_mines
-        self.mines_locs = []
-        self.cells = []
-
-        for row in range(rows):
-            for column in range(columns):
-                cell = ttk.Label(self, width=3, relief='raise', anchor='center', padding=2)
-                cell.grid(row=row, column=column)
-                cell.bind('<Button-1>', lambda event: self.start(event.widget))
-                self.cells.append(cell)
-
-    def cell2loc(self, cell: ttk.Label) -> tuple[int, int]:
-        """
-        Helper method to convert a widget (Label on the board) to its position, in format of (row, column)
-        """
-        index = self.cells.index(cell)
-        return index // self.columns, index % self.columns
-
-    def loc2cell(self, loc: tuple[int, int]) -> ttk.Label:
-        """
-        Helper method to convert a position, in format of (row, column), to the corresponding widget
-        (Label) on the board
-        """
-        return self.cells[loc[0] * self.columns + loc[1]]
-
-    def neighbors_loc(self, loc: tuple[int, int]) -> set:
-        """
-        Helper methods that get a position of a cell on the board, and return a set of the surrounding cells, not
-        included the initial position
-
-        :return: set of neighbors positions.
-        """
-        neighbors = set()
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                neighbor_row = min(max(loc[0] + i, 0), self.rows - 1)
-                neighbor_column = min(max(loc[1] + j, 0), self.columns - 1)
-                neighbors.add((neighbor_row, neighbor_column))
-        neighbors.discard(loc)
-        return neighbors
-
-    def flag(self, cell: ttk.Label) -> None:
-        """
-        Flag or de-flag cell. Flagged cell cannot be opened without de-flag it first. Flagging are bind only to closed
-        cells.
-        """
-        if str(cell.cget('relief')) == 'raise':
-            if not cell.instate(['disabled']):
-                cell.configure(state='disabled', text='¶', foreground='red')
-                self.master.flags.set(self.master.flags.get() + 1)
-            else:
-                cell.configure(state='classic', text='')
-                self.master.flags.set(self.master.flags.get() - 1)
-
-    def lose(self) -> None:
-        """
-        End the game with a lose & uncover the hidden mines.
-        """
-        for mine_loc in self.mines_locs:
-            self.loc2cell(mine_loc).configure(text='*', foreground='black')
-        self.master.over()
-
-    def win(self) -> bool:
-        """
-        check if the game over with a win, and return the outcome
-        """
-        for cell in filter(lambda w: str(w.cget('relief')) == 'raise', self.cells):
-            if self.cell2loc(cell) not in self.mines_locs:
-                return False
-        return True
-
-    def start(self, cell_0: ttk.Label) -> None:
-        """
-        Initialize the mine locations and the user actions, start the game clock and open the first cell
-        """
-        loc = self.cell2loc(cell_0)
-        while len(self.mines_locs) < self.n_mines:
-            row = randrange(self.rows)
-            column = randrange(self.columns)
-            if (row, column) == loc or (row, column) in self.mines_locs:
-                continue
-            self.mines_locs.append((row, column))
-
-        for cell in self.cells:
-            cell.unbind('<Button-1>')
-            cell.bind('<Button-1>', lambda event: self.onclick(event.widget))
-            cell.bind('<Button-2>', lambda event: self.flag(event.widget))
-            cell.bind('<Button-3>', lambda event: self.flag(event.widget))
-        self.master.tic()
-        self.onclick(cell_0)
-
-    def onclick(self, cell: ttk.Label):
-        """
-        Main action of user. By clicking a cell, the game will be end in a lose/win, or be continued. If the game isn't
-        over, the cell will exhibit the number of mines that surrounding it. If no mines surround this cell, the game
-        will open recursively all the closed neighbors of this cell.
-        """
-        # work only closed cell
-        if not cell.instate(['disabled']):
-            cell.configure(relief='flat', state='disabled')
-
-            loc = self.cell2loc(cell)
-            # a lose
-            if loc in self.mines_locs:
-                self.lose()
-            else:
-                neighbors = self.neighbors_loc(loc)
-                # number of neighboring mines
-                mines_neighbors = len(neighbors.intersection(self.mines_locs))
-                cell.configure(text=mines_neighbors if mines_neighbors else '', foreground=self.COLORS[mines_neighbors])
-                # open the neighbor cells recursively
-                if mines_neighbors == 0:
-                    for neighbor in neighbors:
-                        try:
-                            # recursion bug in challenge mode: the python interpreter still running although the Tcl
-                            # interpreter kill the board. We wrap this with try-except block - which is a valid solution
-                            # for this kind of problems.
-                            self.onclick(self.loc2cell(neighbor))
-                        except tk.TclError:
-                            return
-            # a win
-            if self.win():
-                self.master.over()
+import tkinter as tk
+from tkinter import ttk
+
+from history import History
+from solver import Solver
+from state import BoardState
+from replay import CHORD, FLAG, OPEN, recorder
+from telemetry import profiler
+
+
+class BoardView:
+    """
+    The BoardView class is the glue between a headless BoardState and the widget that shows it. It holds the actions
+    of the user (first click, open, chord & flag) by the flat index of the cell, and leaves the drawing to the
+    subclasses, which implement reset (a new game on the same widget), paint (an opened cell), mark (a flagged or
+    de-flagged cell), close (a cell closed again by an undo), show_mines (uncover the mines), show_hint, bind_actions
+    and stop (bind and unbind the user actions). Every action is also recorded to the replay log, and to the moves
+    history for undo and redo.
+    """
+    # define the labels colors for neighboring hint
+    COLORS = (None, 'blue', 'green', 'red', 'purple', 'brown', 'cyan', 'black', 'gray')
+
+    def begin(self, index: int) -> None:
+        """
+        Initialize the mine locations and the user actions, start the game clock and open the first cell
+        """
+        self.model.place_mines(index)
+        recorder.start(self.model)
+        self.bind_actions()
+        self.master.tic()
+        self.reveal(index)
+
+    def click(self, index: int) -> None:
+        """
+        Open a closed cell, or chord an opened one.
+        """
+        if self.model.opened[index]:
+            self.chord(index)
+        else:
+            self.reveal(index)
+
+    def reveal(self, index: int) -> None:
+        """
+        Main action of user. By clicking a cell, the game will be end in a lose/win, or be continued. If the game isn't
+        over, the cell will exhibit the number of mines that surrounding it. If no mines surround this cell, the board
+        state finds the whole opening region, and all its cells are shown in a single pass.
+        """
+        self.open_cells(index, self.model.reveal, OPEN, 'click_us')
+
+    def chord(self, index: int) -> None:
+        """
+        Clicking an opened hint whose neighbors are flagged as many as its hint opens all its other neighbors (and
+        their opening regions), like clicking each of them.
+        """
+        self.open_cells(index, self.model.chord, CHORD, 'chord_us')
+
+    def open_cells(self, index: int, action, kind: int, timer: str) -> None:
+        """
+        Helper method to apply an opening action of the board state to a cell, show the opened cells, record the
+        action and check the game over.
+        """
+        with profiler.timer(timer):
+            opened = action(index)
+            if opened:
+                # configure all the opened cells first, and let Tk redraw them once
+                for cell in opened:
+                    self.paint(cell)
+                self.update_idletasks()
+        # work only closed cell
+        if not opened:
+            return
+        profiler.record('reveal_cells', len(opened))
+        self.record(kind, index, opened)
+
+        with profiler.timer('win_us'):
+            won = self.model.won()
+        # a lose
+        if self.model.lost:
+            self.lose()
+        # a win
+        elif won:
+            self.master.over()
+
+    def record(self, kind: int, index: int, opened: list) -> None:
+        """
+        Keep an opening action: in the replay log, in the moves history and in the solver (if there is one).
+        """
+        recorder.event(kind, index)
+        self.history.push(kind, index, opened)
+        if self.solver is not None:
+            self.solver.update(opened)
+
+    def toggle_flag(self, index: int) -> None:
+        """
+        Flag or de-flag cell. Flagged cell cannot be opened without de-flag it first. Flagging are bind only to closed
+        cells.
+        """
+        with profiler.timer('flag_us'):
+            if self.model.toggle_flag(index) is None:
+                return
+            recorder.event(FLAG, index)
+            self.history.push(FLAG, index, (index,))
+            self.mark(index)
+            self.master.flags.set(self.model.n_flags)
+
+    def undo(self) -> bool:
+        """
+        Take the last move back, and return whether there was a move to undo. Undoing the opening of a mine takes the
+        lose back, and the game goes on from the position before it. The replay log can't follow the undone moves, so
+        the rest of the game isn't recorded, and the solver starts over on the next hint.
+        """
+        move = self.history.undo()
+        if move is None:
+            return False
+        recorder.pause()
+        self.solver = None
+        kind, index, cells = move
+        if kind == FLAG:
+            self.model.toggle_flag(index)
+            self.mark(index)
+            self.master.flags.set(self.model.n_flags)
+            return True
+        lost = self.model.lost
+        self.model.close(cells)
+        for cell in cells:
+            self.close(cell)
+        if lost:
+            for mine in self.model.mine_indices():
+                self.close(mine)
+        return True
+
+    def redo(self) -> bool:
+        """
+        Play the last undone move again, and return whether there was a move to redo.
+        """
+        move = self.history.next_move()
+        if move is None:
+            return False
+        kind, index = move
+        {OPEN: self.reveal, CHORD: self.chord, FLAG: self.toggle_flag}[kind](index)
+        return True
+
+    def hint(self) -> None:
+        """
+        Show the cell the solver would open next: a certainly safe cell if there is any, or else the least risky one.
+        The solver is created on the first hint of the game, and then follows the opened cells.
+        """
+        if not self.model.started or self.model.lost or self.model.won():
+            return
+        if self.solver is None:
+            self.solver = Solver(self.model)
+        answer = self.solver.hint()
+        if answer is not None:
+            self.show_hint(*answer)
+
+    def lose(self) -> None:
+        """
+        End the game with a lose & uncover the hidden mines.
+        """
+        self.show_mines()
+        self.master.over()
+
+    def win(self) -> bool:
+        """
+        check if the game over with a win, and return the outcome
+        """
+        return self.model.won()
+
+
+class Board(BoardView, ttk.Frame):
+    """
+    The Board class define a single game board with specific number of rows, columns & mines. Each board has 2
+    initializations: First the GUI initialization, in which the board parameters assigned and a grid of cells (defined
+    as ttk.Labels) are formed and placed. Second initialization happened after the first click of a user on any cell,
+    which set the mines location, binds all cells to the user actions. The rules of the game are kept in a headless
+    BoardState, and the board only shows it.
+    """
+    def __init__(self, rows: int, columns: int, n_mines: int, master: tk.Tk = None, **options):
+        super(Board, self).__init__(master)
+        # the cells labels by their (row, column), kept between rounds so a board can be resized in place
+        self.pool = {}
+        # all the cells share a single binding tag, so the user actions are bound once for the whole board
+        self.tag = f'Cell{id(self)}'
+        self.reset(rows, columns, n_mines, **options)
+
+    def reset(self, rows: int, columns: int, n_mines: int, **options) -> None:
+        """
+        Reset the board to a new, closed game with the given parameters. The labels of the previous game are reused:
+        only the missing rows and columns are created, and the cells out of the new size are destroyed. The options
+        (seed, safe_radius) are passed to the BoardState.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.n_mines = n_mines
+        self.model = BoardState(rows, columns, n_mines, **options)
+        self.solver = None
+        self.hinted = None
+        self.history = History()
+        self.cells = []
+        self.cell_index = {}
+
+        for row, column in [loc for loc in self.pool if loc[0] >= rows or loc[1] >= columns]:
+            self.pool.pop((row, column)).destroy()
+
+        for row in range(rows):
+            for column in range(columns):
+                cell = self.pool.get((row, column))
+                if cell is None:
+                    cell = ttk.Label(self, width=3, relief='raise', anchor='center', padding=2)
+                    cell.bindtags((self.tag,) + cell.bindtags())
+                    cell.grid(row=row, column=column)
+                    self.pool[(row, column)] = cell
+                else:
+                    cell.configure(relief='raise', state='normal', text='', foreground='')
+                self.cell_index[cell] = len(self.cells)
+                self.cells.append(cell)
+
+        self.stop()
+        self.bind_class(self.tag, '<Button-1>', lambda event: self.start(event.widget))
+
+    def cell2loc(self, cell: ttk.Label) -> tuple[int, int]:
+        """
+        Helper method to convert a widget (Label on the board) to its position, in format of (row, column)
+        """
+        return self.model.loc(self.cell_index[cell])
+
+    def loc2cell(self, loc: tuple[int, int]) -> ttk.Label:
+        """
+        Helper method to convert a position, in format of (row, column), to the corresponding widget
+        (Label) on the board
+        """
+        return self.cells[self.model.index(loc)]
+
+    def paint(self, index: int) -> None:
+        """
+        Show an opened cell, with the number of mines that surrounding it.
+        """
+        count = self.model.counts[index]
+        self.cells[index].configure(relief='flat', state='disabled', text=count if count else '',
+                                    foreground=self.COLORS[count])
+
+    def mark(self, index: int) -> None:
+        """
+        Show a flagged cell with a red flag, or clear a de-flagged one.
+        """
+        if self.model.flagged[index]:
+            self.cells[index].configure(state='disabled', text='¶', foreground='red')
+        else:
+            self.cells[index].configure(state='normal', text='')
+
+    def close(self, index: int) -> None:
+        """
+        Show a closed cell again, with its flag if it is flagged.
+        """
+        self.cells[index].configure(relief='raise', state='normal', text='', foreground='')
+        if self.model.flagged[index]:
+            self.mark(index)
+
+    def show_hint(self, index: int, probability: float) -> None:
+        """
+        Mark the hinted cell: a green dot for a safe cell, or an orange question mark for a guess.
+        """
+        if self.hinted is not None and not self.model.opened[self.hinted]:
+            # clear the previous hint, or show the flag of a cell flagged since it was hinted
+            self.mark(self.hinted)
+        self.hinted = index
+        self.cells[index].configure(text='?' if probability else '•', foreground='orange' if probability else 'green')
+
+    def flag(self, cell: ttk.Label) -> None:
+        """
+        Flag or de-flag the clicked cell.
+        """
+        self.toggle_flag(self.cell_index[cell])
+
+    def show_mines(self) -> None:
+        """
+        Uncover the hidden mines.
+        """
+        for index in self.model.mine_indices():
+            self.cells[index].configure(text='*', foreground='black')
+
+    def bind_actions(self) -> None:
+        """
+        Bind all the cells to the open or chord (left click) and flag (right click) actions.
+        """
+        self.bind_class(self.tag, '<Button-1>', lambda event: self.onclick(event.widget))
+        self.bind_class(self.tag, '<Button-2>', lambda event: self.flag(event.widget))
+        self.bind_class(self.tag, '<Button-3>', lambda event: self.flag(event.widget))
+
+    def stop(self) -> None:
+        """
+        Unbind all the user actions, at the end of the game.
+        """
+        self.unbind_class(self.tag, '<Button-1>')
+        self.unbind_class(self.tag, '<Button-2>')
+        self.unbind_class(self.tag, '<Button-3>')
+
+    def destroy(self) -> None:
+        """
+        Override the Tk method destroy, so it will also remove the shared binding of the cells.
+        """
+        self.stop()
+        super(Board, self).destroy()
+
+    def start(self, cell_0: ttk.Label) -> None:
+        """
+        Start the game from the first clicked cell.
+        """
+        self.begin(self.cell_index[cell_0])
+
+    def onclick(self, cell: ttk.Label) -> None:
+        """
+        Open the clicked cell, or chord it if it is already opened.
+        """
+        self.click(self.cell_index[cell])
+
+
+class CanvasGrid(tk.Canvas):
+    """
+    The CanvasGrid class is the common base of the canvas views: a grid of rows x columns cells drawn on a single
+    tk.Canvas in the colors of the current theme, the closed cells being only a background and grid lines, with the
+    user actions bound once to the whole canvas. A subclass sets the rows and the columns, locates a cell of the grid
+    (locate) and draws the cells over the grid (draw_cells).
+    """
+    # size of the cell in pixels
+    SIZE = 24
+
+    def __init__(self, master: tk.Tk = None):
+        super(CanvasGrid, self).__init__(master, highlightthickness=0, borderwidth=0)
+        # redraw with the new colors whenever the theme is changed
+        self.bind('<<ThemeChanged>>', lambda event: self.draw())
+
+    def locate(self, row: int, column: int):
+        """
+        Return the cell of the model at a (row, column) position of the grid.
+        """
+        raise NotImplementedError
+
+    def draw_cells(self) -> None:
+        """
+        Draw the cells which aren't plain closed cells over the grid.
+        """
+        raise NotImplementedError
+
+    def dispatch(self, event: tk.Event, action) -> None:
+        """
+        Helper method to call an action with the cell under the mouse pointer.
+        """
+        row, column = event.y // self.SIZE, event.x // self.SIZE
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            action(self.locate(row, column))
+
+    def draw(self) -> None:
+        """
+        Draw the whole grid in the colors of the current theme: the closed cells background with raised grid lines, and
+        then the cells.
+        """
+        style = ttk.Style(self)
+        self.closed_color = style.lookup('TButton', 'background') or 'gray85'
+        self.opened_color = style.lookup('TFrame', 'background') or 'gray92'
+        self.font = style.lookup('TLabel', 'font') or 'TkDefaultFont'
+
+        size, width, height = self.SIZE, self.columns * self.SIZE, self.rows * self.SIZE
+        self.configure(width=width, height=height)
+        self.delete('all')
+        self.configure(background=self.closed_color)
+        for column in range(self.columns):
+            self.create_line(column * size, 0, column * size, height, fill='white')
+            self.create_line(column * size + size - 1, 0, column * size + size - 1, height, fill='gray50')
+        for row in range(self.rows):
+            self.create_line(0, row * size, width, row * size, fill='white')
+            self.create_line(0, row * size + size - 1, width, row * size + size - 1, fill='gray50')
+        self.draw_cells()
+
+    def create_cell(self, row: int, column: int, opened: bool, count: int, mine: bool, flagged: bool,
+                    tags: tuple = ()) -> list:
+        """
+        Create the items of a cell at a position of the grid: the opened background with its hint (a count of 0 shows
+        no hint), and a mine or a flag on top.
+
+        :return: list of the created items.
+        """
+        x, y = column * self.SIZE, row * self.SIZE
+        center = (x + self.SIZE // 2, y + self.SIZE // 2)
+        items = []
+        if opened:
+            items.append(self.create_rectangle(x, y, x + self.SIZE - 1, y + self.SIZE - 1, fill=self.opened_color,
+                                               outline='gray70', tags=tags))
+            if count:
+                items.append(self.create_text(*center, text=count, fill=BoardView.COLORS[count], font=self.font,
+                                              tags=tags))
+        if mine:
+            items.append(self.create_text(*center, text='*', fill='black', font=self.font, tags=tags))
+        elif flagged:
+            items.append(self.create_text(*center, text='¶', fill='red', font=self.font, tags=tags))
+        return items
+
+    def bind_actions(self) -> None:
+        """
+        Bind the board to the open or chord (left click) and flag (right click) actions.
+        """
+        self.bind('<Button-1>', lambda event: self.dispatch(event, self.click))
+        self.bind('<Button-2>', lambda event: self.dispatch(event, self.toggle_flag))
+        self.bind('<Button-3>', lambda event: self.dispatch(event, self.toggle_flag))
+
+    def stop(self) -> None:
+        """
+        Unbind all the user actions, at the end of the game.
+        """
+        self.unbind('<Button-1>')
+        self.unbind('<Button-2>')
+        self.unbind('<Button-3>')
+
+
+class CanvasBoard(BoardView, CanvasGrid):
+    """
+    The CanvasBoard class is an alternative view of the board for large boards: the whole grid is drawn on a single
+    tk.Canvas, instead of a Label widget per cell. The closed cells are only a background and grid lines, so building
+    the board is bounded by its rows and columns and not by its area; canvas items are created for a cell only when it
+    changes (dirty cell), and a single binding maps the clicked pixel to a cell arithmetically.
+    """
+    def __init__(self, rows: int, columns: int, n_mines: int, master: tk.Tk = None, **options):
+        super(CanvasBoard, self).__init__(master)
+        self.reset(rows, columns, n_mines, **options)
+
+    def reset(self, rows: int, columns: int, n_mines: int, **options) -> None:
+        """
+        Reset the board to a new, closed game with the given parameters, on the same canvas. The options (seed,
+        safe_radius) are passed to the BoardState.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.n_mines = n_mines
+        self.model = BoardState(rows, columns, n_mines, **options)
+        self.solver = None
+        self.hinted = None
+        self.history = History()
+        # the canvas items of the dirty cells, by the cell index
+        self.items = {}
+
+        self.draw()
+        self.stop()
+        self.bind('<Button-1>', lambda event: self.dispatch(event, self.begin))
+
+    def locate(self, row: int, column: int) -> int:
+        return row * self.columns + column
+
+    def draw_cells(self) -> None:
+        """
+        Draw all the dirty cells again.
+        """
+        dirty = self.items
+        self.items = {}
+        for index in dirty:
+            self.draw_cell(index)
+
+    def draw_cell(self, index: int) -> None:
+        """
+        Redraw a single cell by its state: opened (with its hint or mine), flagged or closed.
+        """
+        for item in self.items.pop(index, ()):
+            self.delete(item)
+        if index == self.hinted:
+            self.delete('hint')
+
+        model = self.model
+        mine = model.mines[index]
+        items = self.create_cell(*divmod(index, self.columns), model.opened[index], 0 if mine else model.counts[index],
+                                 model.lost and mine, model.flagged[index])
+        if items:
+            self.items[index] = items
+
+    def paint(self, index: int) -> None:
+        """
+        Show an opened cell, with the number of mines that surrounding it.
+        """
+        self.draw_cell(index)
+
+    def mark(self, index: int) -> None:
+        """
+        Show a flagged cell with a red flag, or clear a de-flagged one.
+        """
+        self.draw_cell(index)
+
+    def close(self, index: int) -> None:
+        """
+        Show a closed cell again, with its flag if it is flagged.
+        """
+        self.draw_cell(index)
+
+    def show_hint(self, index: int, probability: float) -> None:
+        """
+        Mark the hinted cell: a green dot for a safe cell, or an orange question mark for a guess.
+        """
+        self.delete('hint')
+        self.hinted = index
+        row, column = divmod(index, self.columns)
+        self.create_text(column * self.SIZE + self.SIZE // 2, row * self.SIZE + self.SIZE // 2, tags='hint',
+                         text='?' if probability else '•', fill='orange' if probability else 'green', font=self.font)
+
+    def show_mines(self) -> None:
+        """
+        Uncover the hidden mines.
+        """
+        for index in self.model.mine_indices():
+            self.draw_cell(index)
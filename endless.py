@@ -0,0 +1,346 @@
+from random import randrange
+
+import tkinter as tk
+
+from board import BoardView, CanvasGrid
+
+# the side of a chunk, in cells
+CHUNK = 32
+MASK = (1 << 64) - 1
+
+
+def cell_hash(seed: int, row: int, column: int) -> int:
+    """
+    Return a 64 bits hash of a cell of the board, by the board seed and the cell position (a splitmix64 finalizer), so
+    every cell of an unbounded board has its own fixed random number, with nothing stored.
+    """
+    x = (seed * 0x9E3779B97F4A7C15 + row * 0xBF58476D1CE4E5B9 + column * 0x94D049BB133111EB) & MASK
+    x = (x ^ x >> 30) * 0xBF58476D1CE4E5B9 & MASK
+    x = (x ^ x >> 27) * 0x94D049BB133111EB & MASK
+    return x ^ x >> 31
+
+
+class Chunk:
+    """
+    A square block of CHUNK x CHUNK cells of an endless board, with the flat arrays of its mines, hints, opened and
+    flagged cells (indexed by the position of the cell inside the chunk).
+    """
+    __slots__ = ('mines', 'counts', 'opened', 'flagged')
+
+    def __init__(self, mines: bytearray, counts: bytearray):
+        self.mines = mines
+        self.counts = counts
+        self.opened = bytearray(CHUNK * CHUNK)
+        self.flagged = bytearray(CHUNK * CHUNK)
+
+
+class EndlessState:
+    """
+    The EndlessState class holds the rules of an endless game: a board with no edges, in any direction, addressed by
+    (row, column) positions. Whether a cell is a mine is a pure function of the seed and the position of the cell, so
+    the board is stored only where the player has been: it is split into chunks, and a chunk is created (its mines and
+    hints generated) the first time one of its cells is opened or flagged. The hints on the border of a chunk look at
+    the mines of the neighboring chunks by the same function, without creating them, so an opening region crosses the
+    chunks borders and creates only the chunks it opens.
+
+    The first opened cell is clear, together with the cells up to safe_radius rows/columns around it. There is no win
+    in an endless game: the score is the number of the opened cells, until a mine is opened.
+    """
+    # an opening region stops growing at this size; its opened empty cells on the edge can be chorded to go on
+    MAX_REGION = 1 << 14
+
+    def __init__(self, density: float, seed: int = None, safe_radius: int = 1):
+        if not 0 <= density < 1:
+            raise ValueError(f'the mines density must be in [0, 1), not {density}')
+        self.density = density
+        self.seed = randrange(2 ** 32) if seed is None else seed
+        self.safe_radius = safe_radius
+        self.threshold = int(density * (1 << 64))
+
+        # the created chunks by their (row, column) in chunks
+        self.chunks = {}
+        self.first = None
+        # the flags, the opened safe cells (the score) and the mines in the created chunks
+        self.n_flags = 0
+        self.n_opened = 0
+        self.n_mines = 0
+        self.started = False
+        self.lost = False
+
+    def is_mine(self, row: int, column: int) -> bool:
+        """
+        Return whether a cell is a mine, whether its chunk was created or not
+        """
+        first, radius = self.first, self.safe_radius
+        if first is not None and abs(row - first[0]) <= radius and abs(column - first[1]) <= radius:
+            return False
+        return cell_hash(self.seed, row, column) < self.threshold
+
+    def start(self, first: tuple[int, int]) -> None:
+        """
+        Set the first opened cell, around which the board is kept clear.
+        """
+        self.first = first
+        self.started = True
+
+    def peek(self, loc: tuple[int, int]) -> tuple:
+        """
+        Return the chunk of a cell, or None if it wasn't created, together with the index of the cell in the chunk
+        """
+        chunk_row, row = divmod(loc[0], CHUNK)
+        chunk_column, column = divmod(loc[1], CHUNK)
+        return self.chunks.get((chunk_row, chunk_column)), row * CHUNK + column
+
+    def chunk(self, loc: tuple[int, int]) -> tuple[Chunk, int]:
+        """
+        Return the chunk of a cell, created on the first use, together with the index of the cell in the chunk
+        """
+        chunk_row, row = divmod(loc[0], CHUNK)
+        chunk_column, column = divmod(loc[1], CHUNK)
+        chunk = self.chunks.get((chunk_row, chunk_column))
+        if chunk is None:
+            chunk = self.chunks[(chunk_row, chunk_column)] = self.generate(chunk_row, chunk_column)
+        return chunk, row * CHUNK + column
+
+    def generate(self, chunk_row: int, chunk_column: int) -> Chunk:
+        """
+        Create a chunk: its mines, and its hints as a 3x3 box sum over the mines of the chunk padded with the border of
+        the neighboring chunks.
+        """
+        top, left = chunk_row * CHUNK, chunk_column * CHUNK
+        padded = [bytes(self.is_mine(top + row, left + column) for column in range(-1, CHUNK + 1))
+                  for row in range(-1, CHUNK + 1)]
+        horizontal = [bytes(map(sum, zip(row, row[1:], row[2:]))) for row in padded]
+
+        mines, counts = bytearray(), bytearray()
+        for row in range(CHUNK):
+            middle = padded[row + 1][1:-1]
+            mines += middle
+            counts += bytes(above + center + below - mine for above, center, below, mine in
+                            zip(horizontal[row], horizontal[row + 1], horizontal[row + 2], middle))
+        self.n_mines += sum(mines)
+        return Chunk(mines, counts)
+
+    @staticmethod
+    def neighbors(loc: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Return the positions of the 8 cells surrounding the given cell
+        """
+        row, column = loc
+        return [(row - 1, column - 1), (row - 1, column), (row - 1, column + 1), (row, column - 1),
+                (row, column + 1), (row + 1, column - 1), (row + 1, column), (row + 1, column + 1)]
+
+    def toggle_flag(self, loc: tuple[int, int]):
+        """
+        Flag or de-flag a closed cell. Return the new flag state of the cell, or None if the cell is already opened.
+        """
+        chunk, index = self.chunk(loc)
+        if chunk.opened[index]:
+            return None
+        chunk.flagged[index] ^= 1
+        self.n_flags += 1 if chunk.flagged[index] else -1
+        return bool(chunk.flagged[index])
+
+    def reveal(self, loc: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Open a closed, unflagged cell. If the cell is a mine the game is lost; if no mines surround it, all the cells
+        that are connected to it through empty cells are opened too, across the chunks, up to MAX_REGION cells.
+
+        :return: list of the positions of the cells that were opened by this action, in the order they were opened.
+        """
+        chunk, index = self.chunk(loc)
+        if chunk.opened[index] or chunk.flagged[index]:
+            return []
+        chunk.opened[index] = 1
+        if chunk.mines[index]:
+            self.lost = True
+            return [loc]
+
+        region = [loc]
+        # the region list is also the queue: every cell is appended once, when it is opened
+        for current in region:
+            if len(region) >= self.MAX_REGION:
+                break
+            chunk, index = self.chunk(current)
+            if chunk.counts[index]:
+                continue
+            for neighbor in self.neighbors(current):
+                chunk, index = self.chunk(neighbor)
+                if not chunk.opened[index] and not chunk.flagged[index]:
+                    chunk.opened[index] = 1
+                    region.append(neighbor)
+        self.n_opened += len(region)
+        return region
+
+    def chord(self, loc: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Open all the closed, unflagged neighbors of an opened cell, if as many of its neighbors are flagged as its hint
+        (an empty cell left closed neighbors only at the edge of a region that stopped growing).
+
+        :return: list of the positions of the cells that were opened by this action.
+        """
+        chunk, index = self.peek(loc)
+        if chunk is None or not chunk.opened[index]:
+            return []
+        flags = 0
+        for neighbor in self.neighbors(loc):
+            neighbor_chunk, neighbor_index = self.peek(neighbor)
+            flags += neighbor_chunk is not None and neighbor_chunk.flagged[neighbor_index]
+        if flags != chunk.counts[index]:
+            return []
+        region = []
+        for neighbor in self.neighbors(loc):
+            region.extend(self.reveal(neighbor))
+        return region
+
+    def won(self) -> bool:
+        """
+        An endless game is never won
+        """
+        return False
+
+
+class EndlessBoard(BoardView, CanvasGrid):
+    """
+    The EndlessBoard class is the view of an endless game: a canvas of a fixed number of rows and columns (the
+    viewport) over the endless board, scrolled by the arrow keys and the mouse wheel (with Shift, sideways). Only the
+    viewport is drawn, so the canvas holds the same number of items however far the player goes: the grid lines stay
+    in place, and a scroll redraws the opened and flagged cells of the viewport. The cells are addressed by their
+    (row, column) positions on the endless board, and the opening actions are those of BoardView, with no replay log,
+    moves history or solver.
+
+    The level sets the size of the viewport and the density of the mines, as the mines per cell of its board.
+    """
+    # the scrolling keys, by the rows and columns they move the viewport
+    KEYS = {'<Up>': (-1, 0), '<Down>': (1, 0), '<Left>': (0, -1), '<Right>': (0, 1)}
+    # the cells scrolled by a turn of the mouse wheel
+    WHEEL = 3
+
+    def __init__(self, rows: int, columns: int, n_mines: int, master: tk.Tk = None, **options):
+        super(EndlessBoard, self).__init__(master)
+        # the scrolling keys work while the mouse pointer is over the board
+        self.bind('<Enter>', lambda event: self.focus_set())
+        for key, (rows_step, columns_step) in self.KEYS.items():
+            self.bind(key, lambda event, steps=(rows_step, columns_step): self.scroll(*steps))
+        self.bind('<MouseWheel>', lambda event: self.scroll(-self.WHEEL if event.delta > 0 else self.WHEEL, 0))
+        self.bind('<Shift-MouseWheel>', lambda event: self.scroll(0, -self.WHEEL if event.delta > 0 else self.WHEEL))
+        self.bind('<Button-4>', lambda event: self.scroll(-self.WHEEL, 0))
+        self.bind('<Button-5>', lambda event: self.scroll(self.WHEEL, 0))
+        self.reset(rows, columns, n_mines, **options)
+
+    def reset(self, rows: int, columns: int, n_mines: int, **options) -> None:
+        """
+        Reset the board to a new, closed endless game, with a viewport of the given rows and columns. The options
+        (seed, safe_radius) are passed to the EndlessState.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.model = EndlessState(n_mines / (rows * columns), **options)
+        # the position of the top-left cell of the viewport on the endless board
+        self.top, self.left = 0, 0
+
+        self.draw()
+        self.focus_set()
+        self.stop()
+        self.bind('<Button-1>', lambda event: self.dispatch(event, self.begin))
+
+    @property
+    def score(self) -> int:
+        return self.model.n_opened
+
+    def locate(self, row: int, column: int) -> tuple[int, int]:
+        return self.top + row, self.left + column
+
+    def scroll(self, rows: int, columns: int) -> None:
+        """
+        Move the viewport by the given rows and columns, and redraw its cells.
+        """
+        self.top += rows
+        self.left += columns
+        self.draw_cells()
+
+    def draw_cells(self) -> None:
+        """
+        Redraw all the cells of the viewport.
+        """
+        self.delete('cell')
+        if self.model.started:
+            for row in range(self.top, self.top + self.rows):
+                for column in range(self.left, self.left + self.columns):
+                    self.draw_cell((row, column))
+
+    def draw_cell(self, loc: tuple[int, int]) -> None:
+        """
+        Redraw a single cell of the viewport by its state: opened (with its hint or mine), flagged or closed.
+        """
+        row, column = loc[0] - self.top, loc[1] - self.left
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            return
+        tag = f'r{loc[0]}c{loc[1]}'
+        self.delete(tag)
+
+        chunk, index = self.model.peek(loc)
+        if chunk is None:
+            opened = count = flagged = 0
+        else:
+            opened, flagged = chunk.opened[index], chunk.flagged[index]
+            count = 0 if chunk.mines[index] else chunk.counts[index]
+        self.create_cell(row, column, opened, count, self.model.lost and self.model.is_mine(*loc), flagged,
+                         tags=('cell', tag))
+
+    def paint(self, loc: tuple[int, int]) -> None:
+        self.draw_cell(loc)
+
+    def show_mines(self) -> None:
+        """
+        Uncover the mines of the viewport.
+        """
+        self.draw_cells()
+
+    def begin(self, loc: tuple[int, int]) -> None:
+        """
+        Clear the board around the first clicked cell, bind the user actions, start the game clock and open the cell
+        """
+        self.model.start(loc)
+        self.bind_actions()
+        self.master.tic()
+        self.reveal(loc)
+
+    def click(self, loc: tuple[int, int]) -> None:
+        """
+        Open a closed cell, or chord an opened one.
+        """
+        chunk, index = self.model.peek(loc)
+        if chunk is not None and chunk.opened[index]:
+            self.chord(loc)
+        else:
+            self.reveal(loc)
+
+    def record(self, kind: int, loc: tuple[int, int], opened: list) -> None:
+        """
+        An endless game isn't recorded: only the mines counter follows the created chunks.
+        """
+        self.master.mines.set(self.model.n_mines)
+
+    def toggle_flag(self, loc: tuple[int, int]) -> None:
+        """
+        Flag or de-flag a closed cell.
+        """
+        if self.model.toggle_flag(loc) is None:
+            return
+        self.draw_cell(loc)
+        self.master.flags.set(self.model.n_flags)
+
+    def hint(self) -> None:
+        """
+        The solver plays bounded boards only, so there are no hints in an endless game.
+        """
+
+    def undo(self) -> bool:
+        """
+        The endless board keeps no moves history, so there is nothing to undo.
+        """
+        return False
+
+    def redo(self) -> bool:
+        return False
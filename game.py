@@ -1,41 +1,42 @@
 import json
-from time import gmtime, strftime
+from time import gmtime, perf_counter, strftime
 import tkinter as tk
 from tkinter import ttk
 
-# Want extra themes? you can install ttkthemes package, but it isn't mandatory
-try:
-    from ttkthemes import ThemedStyle as Style
-except ImportError:
-    from tkinter.ttk import Style
-
-from board import Board
+from board import Board, CanvasBoard
+from endless import EndlessBoard
 from info import Fame, helper
+from replay import END, TICK, recorder
+from rules import CHALLENGE, LEVELS, harden
+from telemetry import profiler
 
 
 class Game(tk.Tk):
     """
     The main game app, which handle all the user setting of game type
     """
-    # board params by level
-    LEVELS = {'easy': dict(rows=9, columns=9, n_mines=10),
-              'normal': dict(rows=16, columns=16, n_mines=40),
-              'hard': dict(rows=16, columns=36, n_mines=99)}
-
-    # changes in the board params by level
-    CHALLENGE = {'easy': dict(time=900, t_decrease=5, t_limit=300, d_mines=2, score=-1),
-                 'normal': dict(time=600, t_decrease=5, t_limit=240, d_mines=1, score=-1),
-                 'hard': dict(time=600, t_decrease=6, t_limit=180, d_mines=1, score=-1)}
+    # the board views: a label per cell, or the whole board drawn on a single canvas (lighter for large boards)
+    RENDERERS = {'labels': Board, 'canvas': CanvasBoard}
 
-    def __init__(self):
+    def __init__(self, profile: str = None):
         super(Game, self).__init__()
+        # profile the game hot paths into the given json file (or by the MINESWEEPER_PROFILE environment variable)
+        profiler.enable(profile)
+        # record all the played games to a replay log
+        recorder.open()
         self.resizable(False, False)
         self.title('Our MineSweeper')
-        self.style = Style()
+        # the built-in themes; the extra themes (if ttkthemes is installed) are loaded only when they are needed
+        self.style = ttk.Style(self)
+        self.themes_loaded = False
 
         self.tac = None
         self.time = None
         self.board = None
+        # a game with undone moves is a practice game
+        self.practice = False
+        # the current game is over (lost, won or out of time), and waits for a click to replay
+        self.game_over = False
 
         self.clock = tk.StringVar(self, value='Click to play')
         self.mines = tk.IntVar(self)
@@ -43,6 +44,8 @@ class Game(tk.Tk):
         self.mode = tk.StringVar(self)
         self.level = tk.StringVar(self)
         self.theme = tk.StringVar(self)
+        self.renderer = tk.StringVar(self)
+        self.no_guess = tk.BooleanVar(self)
 
         # load and set the last game played setting
         try:
@@ -54,20 +57,29 @@ class Game(tk.Tk):
         self.level.set(setting['level'])
         self.mode.set(setting['mode'])
         self.theme.set(setting['theme'])
+        self.renderer.set(setting.get('renderer', 'labels'))
+        self.no_guess.set(setting.get('no_guess', False))
         self.set_theme()
-        self.board_params = self.LEVELS[setting['level']].copy()
-        self.challenge_params = self.CHALLENGE[setting['level']].copy()
+        self.board_params = LEVELS[setting['level']].copy()
+        self.challenge_params = CHALLENGE[setting['level']].copy()
 
-        self.fame = Fame(self)          # add yours filename if you want another json record file
+        self.fame = Fame(self)          # add yours filenames if you want another records database
+        # the no-guess boards of the challenge rounds, generated in a background process (created on the first use)
+        self.generator = None
 
         # add the control frame of the app
         self.menu_and_panels()
 
         # add keyboard shortcuts
         self.bind('<Control-n>', lambda event: self.new_game())
+        self.bind('<Control-t>', lambda event: self.board.hint())
+        self.bind('<Control-z>', lambda event: self.undo())
+        self.bind('<Control-y>', lambda event: self.redo())
         self.bind('<Control-h>', lambda event: helper(self))
         self.bind('<Control-f>', lambda event: self.fame.show())
         self.bind('<Escape>', lambda event: self.destroy())
+        # closing the window from its title bar saves and closes everything, as the Exit menu does
+        self.protocol('WM_DELETE_WINDOW', self.destroy)
 
         # initiate a new game based on the setting
         self.new_game()
@@ -85,6 +97,7 @@ class Game(tk.Tk):
         control_menu = tk.Menu(main_menu)
         level_menu = tk.Menu(control_menu)
         mode_menu = tk.Menu(control_menu)
+        renderer_menu = tk.Menu(control_menu)
 
         level_menu.add_radiobutton(label='Easy', variable=self.level, value='easy', command=self.new_game)
         level_menu.add_radiobutton(label='Normal', variable=self.level, value='normal', command=self.new_game)
@@ -92,11 +105,20 @@ class Game(tk.Tk):
 
         mode_menu.add_radiobutton(label='Classic', variable=self.mode, value='classic', command=self.new_game)
         mode_menu.add_radiobutton(label='Challenge', variable=self.mode, value='challenge', command=self.new_game)
+        mode_menu.add_radiobutton(label='Endless', variable=self.mode, value='endless', command=self.new_game)
+
+        renderer_menu.add_radiobutton(label='Labels', variable=self.renderer, value='labels', command=self.new_game)
+        renderer_menu.add_radiobutton(label='Canvas', variable=self.renderer, value='canvas', command=self.new_game)
 
         control_menu.add_command(label='New', accelerator='Ctrl-N', command=self.new_game)
+        control_menu.add_command(label='Hint', accelerator='Ctrl-T', command=lambda: self.board.hint())
+        control_menu.add_command(label='Undo', accelerator='Ctrl-Z', command=self.undo)
+        control_menu.add_command(label='Redo', accelerator='Ctrl-Y', command=self.redo)
         control_menu.add_separator()
         control_menu.add_cascade(label='Level', menu=level_menu)
         control_menu.add_cascade(label='Mode', menu=mode_menu)
+        control_menu.add_cascade(label='Renderer', menu=renderer_menu)
+        control_menu.add_checkbutton(label='No-guess challenge', variable=self.no_guess, command=self.new_game)
         control_menu.add_separator()
         control_menu.add_command(label='Close', accelerator='Esc', command=self.destroy)
         main_menu.add_cascade(label='Control', menu=control_menu)
@@ -109,11 +131,9 @@ class Game(tk.Tk):
         info_menu.add_command(label='Reset', command=self.fame.reset)
         main_menu.add_cascade(label='Info', menu=info_menu)
 
-        # themes menu: appearance change
+        # themes menu: appearance change, filled when it is first opened
         theme_menu = tk.Menu(main_menu)
-        # using the built-in themes - may vary as decency on the platform.
-        for theme in sorted(self.style.theme_names()):
-            theme_menu.add_radiobutton(label=theme, value=theme, variable=self.theme, command=self.set_theme)
+        theme_menu.configure(postcommand=lambda: self.fill_themes(theme_menu))
         main_menu.add_cascade(label='Themes', menu=theme_menu)
 
         self.configure(menu=main_menu)
@@ -133,26 +153,69 @@ class Game(tk.Tk):
         ttk.Label(bottom, text='Mines: ').pack(side='right')
         bottom.grid(row=2, sticky=('e', 'w'))
 
+    def load_themes(self):
+        """
+        Load the extra themes of the ttkthemes package, once. Want extra themes? you can install ttkthemes package, but
+        it isn't mandatory. Importing it takes a while, so it is done only when the themes menu is first opened or the
+        saved theme isn't a built-in one.
+        """
+        if self.themes_loaded:
+            return
+        self.themes_loaded = True
+        try:
+            from ttkthemes import ThemedStyle
+        except ImportError:
+            return
+        self.style = ThemedStyle(self)
+
+    def fill_themes(self, theme_menu: tk.Menu):
+        """
+        Add all the themes to the themes menu, the first time it is opened.
+        """
+        if theme_menu.index('end') is not None:
+            return
+        self.load_themes()
+        # using the built-in themes - may vary as decency on the platform.
+        for theme in sorted(self.style.theme_names()):
+            theme_menu.add_radiobutton(label=theme, value=theme, variable=self.theme, command=self.set_theme)
+
+    def load_generator(self):
+        """
+        Return the generator of the no-guess boards, created the first time a no-guess challenge is played. Importing it
+        takes a while (it brings the multiprocessing machinery), so it is kept out of the startup.
+        """
+        if self.generator is None:
+            from generator import Generator
+            self.generator = Generator()
+        return self.generator
+
     def set_theme(self):
         """
         Change the way the app look like
         """
+        if self.theme.get() not in self.style.theme_names():
+            self.load_themes()
         self.style.theme_use(self.theme.get())
 
-    def tic(self):
+    def tic(self, due: float = None):
         """
-        Measure the game time. For 'classic' mode the time is cumulative and represent the score. For 'challenge' mode
-        the time is decreasing and if it hit zero the game is over with a lose.
+        Measure the game time. For 'classic' mode the time is cumulative and represent the score, and so it is for
+        'endless' mode (with no score). For 'challenge' mode the time is decreasing and if it hit zero the game is over
+        with a lose. The scheduled calls get the time they were due, so the profiler can measure how late the clock is.
         """
+        if due is not None:
+            profiler.record('tic_drift_us', (perf_counter() - due) * 1e6)
         self.detic()
+        recorder.event(TICK, self.time)
         self.clock.set(strftime("%H:%M:%S", gmtime(self.time)))
-        if self.mode.get() == 'classic':
+        if self.mode.get() != 'challenge':
             self.time += 1
         else:
             self.time -= 1
             if self.time < 0:
                 self.over()
-        self.tac = self.after(1000, self.tic)
+                return
+        self.tac = self.after(1000, self.tic, perf_counter() + 1)
 
     def detic(self):
         """
@@ -168,103 +231,163 @@ class Game(tk.Tk):
         """
         is_challenge = self.mode.get() == 'challenge'
         is_win = self.board.win()
+        recorder.event(END, is_win)
+        # the next round starts its own game: its first ticks are not events of this one
+        recorder.pause()
 
         # play another round
         if is_challenge and is_win:
             self.challenge()
         else:
+            self.game_over = True
             self.detic()
-            for cell in self.board.winfo_children():
-                cell.unbind('<Button-1>')
-                cell.unbind('<Button-2>')
-                cell.unbind('<Button-3>')
-
-            current_record: dict = self.fame.records[self.mode.get()][self.level.get()]
-            # classic mode winner
-            if not is_challenge and is_win:
-                if not current_record or self.time < min(current_record.values()):
-                    self.fame.update(self.time)
-                    self.fame.show()
-            # race mode winner
-            elif is_challenge and not is_win:
-                if not current_record or self.challenge_params['score'] > max(current_record.values()):
-                    self.fame.update(self.challenge_params['score'])
-                    self.fame.show()
+            self.board.stop()
+
+            # a practice game (with undone moves) makes no records
+            if not self.practice:
+                current_record = self.fame.best(self.mode.get(), self.level.get())
+                # classic mode winner
+                if not is_challenge and is_win:
+                    if current_record is None or self.time < current_record:
+                        self.fame.update(self.time, self.board.model.bbbv / self.time)
+                        self.fame.show()
+                # race mode winner
+                elif is_challenge and not is_win:
+                    if current_record is None or self.challenge_params['score'] > current_record:
+                        self.fame.update(self.challenge_params['score'])
+                        self.fame.show()
+                # endless mode explorer: the score is the number of the opened cells
+                elif self.mode.get() == 'endless':
+                    if current_record is None or self.board.score > current_record:
+                        self.fame.update(self.board.score)
+                        self.fame.show()
 
             # load a new game with the current mode & level with the player action
             self.clock.set('Click to replay')
             self.bind('<Button-1>', lambda event: self.new_game())
 
+    def undo(self):
+        """
+        Take the last move back. The game turns into a practice game, which makes no records, and a game which was over
+        goes on from the position before its last move. A challenge round that ran out of time goes on with its clock
+        stopped.
+        """
+        if not self.board.undo():
+            return
+        if not self.practice:
+            self.practice = True
+            self.title('Our MineSweeper - practice')
+        if self.game_over:
+            self.game_over = False
+            self.unbind('<Button-1>')
+            self.board.bind_actions()
+            if self.time >= 0:
+                self.tic()
+            else:
+                self.clock.set('Out of time')
+
+    def redo(self):
+        """
+        Play the last undone move again, unless the game is over.
+        """
+        if not self.game_over:
+            self.board.redo()
+
     def classic(self):
         """
         Load the a new classic game.
         """
         self.time = 0
         self.flags.set(0)
-        self.board = Board(master=self, **self.board_params)
+        with profiler.timer('build_classic_us'):
+            self.load_board()
         self.mines.set(self.board_params['n_mines'])
-        self.board.grid(row=1)
 
     def challenge(self):
         """
         Load our new mode: challenge. By each win, another, harder game will be loaded immediately, and the clock will
-        start ticking.
+        start ticking. With no-guess boards, the round gets the board that was prefetched for it (if it is ready, or
+        else a random board), with its first cell opened, and the board of the next round is prefetched.
         """
-        if self.board is not None:
-            self.board.destroy()
-
         # load the new game
         self.time = self.challenge_params['time']
         self.flags.set(0)
         self.mines.set(self.board_params['n_mines'])
-        self.board = Board(master=self, **self.board_params)
-
-        # updating the parameters, so the next game will be harder
-        # decrease time (with some limitations)
-        if self.challenge_params['time'] > self.challenge_params['t_limit']:
-            self.challenge_params['time'] -= self.challenge_params['t_decrease']
-
-        # increasing mines number each 2 or 4 rounds
-        if not self.challenge_params['score'] % self.challenge_params['d_mines']:
-            self.board_params['n_mines'] += 1
-
-        # increasing the number of rows or columns each 2 mines
-        if not self.challenge_params['score'] % (self.challenge_params['d_mines'] * 4):
-            self.board_params['rows'] += 1
-        elif not self.challenge_params['score'] % (self.challenge_params['d_mines'] * 2):
-            self.board_params['columns'] += 1
+        min_3bv = self.challenge_params['min_3bv']
+        preset = self.load_generator().take(self.board_params, min_3bv) if self.no_guess.get() else None
+        with profiler.timer('build_challenge_us'):
+            if preset is None:
+                self.load_board(min_3bv=min_3bv)
+            else:
+                self.load_board(seed=preset['seed'], safe_radius=preset['safe_radius'])
+        harden(self.board_params, self.challenge_params)
+        if self.no_guess.get():
+            # the board params are already hardened: these are the next round's
+            self.load_generator().request(self.board_params, min_3bv)
+        if preset is not None:
+            self.board.begin(preset['first'])
+
+    def endless(self):
+        """
+        Load an endless game: a board with no edges, seen through a viewport of the level size, with the mines density
+        of the level. The replay log can't replay it, so it isn't recorded.
+        """
+        self.time = 0
+        self.flags.set(0)
+        self.mines.set(0)
+        recorder.pause()
+        with profiler.timer('build_endless_us'):
+            self.load_board()
 
-        self.challenge_params['score'] += 1
-        self.board.grid(row=1)
+    def load_board(self, **options):
+        """
+        Load a board with the current board parameters, and the given board options (seed, safe_radius). The board on
+        the screen is reset and resized in place, and is only replaced when the renderer (or from or to the endless
+        mode) was changed.
+        """
+        renderer = EndlessBoard if self.mode.get() == 'endless' else self.RENDERERS[self.renderer.get()]
+        if type(self.board) is renderer:
+            self.board.reset(**self.board_params, **options)
+        else:
+            if self.board is not None:
+                self.board.destroy()
+            self.board = renderer(master=self, **self.board_params, **options)
+            self.board.grid(row=1)
 
     def new_game(self):
         """
         Load the new game. The method warp both classic and challenge methods. Call this method in the middle of a
         challenge mode game will initialize the board, without saving the progress.
         """
-        try:
-            self.board.destroy()
-            self.detic()
-        except AttributeError:
-            pass
-        finally:
-            # after a game-over, unbind the new_game call to avoid recursive
-            self.unbind('<Button-1>')
-            self.board_params = self.LEVELS[self.level.get()].copy()
-            self.challenge_params = self.CHALLENGE[self.level.get()].copy()
-            if self.mode.get() == 'classic':
-                self.classic()
-            else:
-                self.challenge()
-            self.clock.set('Click to play')
+        self.detic()
+        # after a game-over, unbind the new_game call to avoid recursive
+        self.unbind('<Button-1>')
+        self.board_params = LEVELS[self.level.get()].copy()
+        self.challenge_params = CHALLENGE[self.level.get()].copy()
+        self.practice = False
+        self.game_over = False
+        self.title('Our MineSweeper')
+        # a no-guess challenge round starts the clock by itself
+        self.clock.set('Click to play')
+        if self.mode.get() == 'classic':
+            self.classic()
+        elif self.mode.get() == 'challenge':
+            self.challenge()
+        else:
+            self.endless()
     
     def destroy(self):
         """
         Override the Tk method destroy, so it will also save the last game setting and records.
         """
         with open('setting.json', 'w') as fp:
-            json.dump(dict(mode=self.mode.get(), level=self.level.get(), theme=self.theme.get()), fp)
-        self.fame.save()        # add yours filename if you want another json record file
+            json.dump(dict(mode=self.mode.get(), level=self.level.get(), theme=self.theme.get(),
+                           renderer=self.renderer.get(), no_guess=self.no_guess.get()), fp)
+        self.fame.save()
+        if self.generator is not None:
+            self.generator.close()
+        profiler.dump()
+        recorder.close()
         super(Game, self).destroy()
 
 
@@ -0,0 +1,140 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from random import Random
+
+from solver import Solver
+from state import BoardState
+
+# in the worker process: the last job ticket which was cancelled, shared with the app process
+cancelled = None
+
+
+def solvable(model: BoardState, first: int) -> bool:
+    """
+    Play a board from its first cell by the deductions of the solver only, and return whether it was cleared without a
+    single guess. The mines are placed first, unless they already are.
+    """
+    if not model.started:
+        model.place_mines(first)
+    solver = Solver(model)
+    solver.update(model.reveal(first))
+    while not model.won():
+        answer = solver.hint()
+        if answer is None or answer[0] not in solver.safe:
+            return False
+        solver.update(model.reveal(answer[0]))
+    return True
+
+
+def init_worker(shared) -> None:
+    """
+    Keep the cancelled ticket shared by the app, in the worker process.
+    """
+    global cancelled
+    cancelled = shared
+
+
+def no_guess(rows: int, columns: int, n_mines: int, seed: int, safe_radius: int = 1, attempts: int = 100,
+             min_3bv: int = 0, ticket: int = None):
+    """
+    Re-roll the layouts of a board until one has a 3BV of at least min_3bv, and can be cleared from its first cell
+    with no guess. A job of the worker process gives its ticket, and stops between two layouts once its ticket is
+    cancelled.
+
+    :return: the board options of the layout, a dict of its seed, safe_radius and first cell, or None if no layout out
+    of the attempts was solvable (or the job was cancelled).
+    """
+    rng = Random(seed)
+    for _ in range(attempts):
+        if ticket is not None and cancelled is not None and cancelled.value >= ticket:
+            return None
+        options = dict(seed=rng.randrange(2 ** 32), safe_radius=safe_radius)
+        first = rng.randrange(rows * columns)
+        model = BoardState(rows, columns, n_mines, **options)
+        model.place_mines(first)
+        if model.bbbv >= min_3bv and solvable(model, first):
+            return dict(options, first=first)
+    return None
+
+
+class Generator:
+    """
+    The Generator class prefetches no-guess boards in a background process, so they are ready before they are needed.
+    A board is asked for by its parameters ahead of time, and is taken only if it is already done: taking a board never
+    waits, and returns None while the board is still being generated (then a plain random board is played instead).
+
+    There is a single worker, which runs the jobs in the order they were requested, each one with an increasing ticket.
+    A job is cancelled by sharing its ticket with the worker, which drops the job between two layouts, so a board that
+    is no longer wanted never holds the worker from the next ones.
+
+    A no-guess board is reproduced by its seed, so the board state, the replay log and the solver all see it as any
+    other board; only its first cell is fixed, and is opened for the player.
+    """
+    def __init__(self, safe_radius: int = 1, attempts: int = 100):
+        self.safe_radius = safe_radius
+        self.attempts = attempts
+        self.rng = Random()
+        self.executor = None
+        # the boards being generated, by their parameters, with their job tickets
+        self.futures = {}
+        self.ticket = 0
+        self.cancelled = None
+
+    @staticmethod
+    def key(board_params: dict, min_3bv: int = 0) -> tuple:
+        return board_params['rows'], board_params['columns'], board_params['n_mines'], min_3bv
+
+    def request(self, board_params: dict, min_3bv: int = 0) -> None:
+        """
+        Start generating a board with the given parameters, and a 3BV of at least min_3bv. The worker process is
+        started on the first request.
+        """
+        key = self.key(board_params, min_3bv)
+        if key in self.futures:
+            return
+        if self.executor is None:
+            # a fresh interpreter for the worker, rather than a fork of the process that runs the Tk app
+            context = get_context('spawn')
+            self.cancelled = context.Value('q', 0)
+            self.executor = ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=init_worker,
+                                                initargs=(self.cancelled,))
+        self.ticket += 1
+        rows, columns, n_mines, _ = key
+        future = self.executor.submit(no_guess, rows, columns, n_mines, self.rng.randrange(2 ** 32), self.safe_radius,
+                                      self.attempts, min_3bv, self.ticket)
+        self.futures[key] = future, self.ticket
+
+    def cancel(self, future, ticket: int) -> None:
+        """
+        Cancel a job: drop it if it didn't start, or else stop it at the next layout it tries. The jobs run in the order
+        of their tickets, so a job which has started holds the highest ticket that did.
+        """
+        if not future.cancel():
+            with self.cancelled.get_lock():
+                self.cancelled.value = max(self.cancelled.value, ticket)
+
+    def take(self, board_params: dict, min_3bv: int = 0):
+        """
+        Return the options of a ready no-guess board with the given parameters and minimal 3BV (seed, safe_radius and
+        first cell), or None if it isn't ready. A board which isn't ready when it is taken is cancelled, so it doesn't
+        hold the worker from the next boards.
+        """
+        key = self.key(board_params, min_3bv)
+        future, ticket = self.futures.pop(key, (None, None))
+        if future is None:
+            return None
+        if not future.done():
+            self.cancel(future, ticket)
+            return None
+        return None if future.exception() is not None else future.result()
+
+    def close(self) -> None:
+        """
+        Drop the boards that are still being generated, and stop the worker process.
+        """
+        for future, ticket in self.futures.values():
+            self.cancel(future, ticket)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.futures = {}
@@ -0,0 +1,47 @@
+from array import array
+
+
+class History:
+    """
+    The History class is the moves history of a game, for undo and redo. A move keeps only its kind, its cell and the
+    cells it changed (opened, or flagged), so the history takes a memory by the cells changed during the game, and not
+    by the board size times the moves. An earlier position is rebuilt by undoing the moves after it, cell by cell, and a
+    later one by playing the undone moves again: the rules are deterministic, so a move redone from the same position
+    changes the same cells.
+    """
+    def __init__(self):
+        # the moves of the game in format of (kind, index, cells), and the number of them that are applied
+        self.moves = []
+        self.cursor = 0
+
+    def push(self, kind: int, index: int, cells: list) -> None:
+        """
+        Add an applied move. A move which is the next undone move (a redo) keeps the undone moves after it; any other
+        move drops them.
+        """
+        if self.cursor < len(self.moves) and self.moves[self.cursor][:2] == (kind, index):
+            self.cursor += 1
+            return
+        del self.moves[self.cursor:]
+        self.moves.append((kind, index, array('I', cells)))
+        self.cursor += 1
+
+    def undo(self):
+        """
+        Step back a move. Return the move to undo, or None if there isn't any.
+        """
+        if not self.cursor:
+            return None
+        self.cursor -= 1
+        return self.moves[self.cursor]
+
+    def next_move(self):
+        """
+        Return the kind and the cell of the next undone move, to be redone, or None if there isn't any.
+        """
+        if self.cursor == len(self.moves):
+            return None
+        return self.moves[self.cursor][:2]
+
+    def __len__(self) -> int:
+        return self.cursor
@@ -1,5 +1,6 @@
 import time
-import json
+import sqlite3
+from functools import lru_cache
 
 import tkinter as tk
 from tkinter import ttk
@@ -7,135 +8,161 @@ from tkinter import messagebox as msg
 from tkinter.simpledialog import askstring
 from tkinter.scrolledtext import ScrolledText
 
+from records import RecordStore
+
+# the levels of the Hall of Fame, in their order
+LEVELS = ('easy', 'normal', 'hard')
+
 
 class Fame:
     """
-    Fame class is submissive to the Game class and outsourcing the management of the history records. It loading the
-    proper records file if exist, update when there is a new record and save the records to json log file.
+    Fame class is submissive to the Game class and outsourcing the management of the history records. It keeps the
+    records in a RecordStore (a SQLite database, with the full history of the records), which migrates the records
+    json file of the earlier versions by itself.
     """
-    def __init__(self, root: tk.Tk, log: str = 'records.json'):
+    def __init__(self, root: tk.Tk, log: str = 'records.json', database: str = 'records.db'):
         self.root = root
-        try:
-            with open(log) as fp:
-                self.records = json.load(fp)
-        except FileNotFoundError:
-            self.records = {'classic': dict(easy={}, normal={}, hard={}),
-                            'challenge': dict(easy={}, normal={}, hard={})}
+        self.store = RecordStore(database, legacy=log)
+        # the Hall of Fame window, and its tables of labels by (mode, level)
+        self.window = None
+        self.tables = {}
 
-    def save(self, filename='records.json') -> None:
+    def save(self) -> None:
         """
-        Save the records to a json file (named by default as 'records.json')
+        Wait for all the new records to be written, and close the records database
         """
         try:
-            with open(filename, 'w') as fp:
-                json.dump(self.records, fp, indent=4)
+            self.store.close()
+            errors = self.store.errors
+        except sqlite3.Error as error:
+            errors = [error]
 
-        except PermissionError:
+        if errors:
             msg.showerror('Fame not yours to Claim',
                           message="""Your source file in a bad directory
 Move the game files to another directory
 in order to save your achievements""")
 
-        except TypeError:
-            msg.showerror('Fame not yours to Claim',
-                          message="""Something gone terribly wrong
-We don't sure how, but you really
-messed up something with the code""")
-
     def show(self):
         """
-        Show the Hall of Fame, allow you to show off your previous achievements, or be frustrated by over players
+        Show the Hall of Fame, allow you to show off your previous achievements, or be frustrated by over players. The
+        window is built on the first time, and then it is only hidden when closed, and shown again.
+        """
+        if self.window is None:
+            self.build()
+        self.window.deiconify()
+        self.window.lift()
+
+    def build(self):
+        """
+        Build the Hall of Fame window, with an empty table of labels for every mode-level, and fill the tables.
         """
-        top = tk.Toplevel(self.root)
+        top = self.window = tk.Toplevel(self.root)
         top.title('Hall of Fame')
         top.resizable(False, False)
+        top.protocol('WM_DELETE_WINDOW', top.withdraw)
         hall = ttk.Frame(top)
 
         ttk.Label(hall, text=f"The Champions of Our MineSweeper".title(), anchor='center', font=dict(size=14)
-                  ).grid(row=0, columnspan=2, sticky=('e', 'w'), pady=4)
-
-        # The champions of the classic mode
-        classic = ttk.LabelFrame(hall, text='Classic Mode', labelanchor='n', padding=4, width=40)
-        for level in self.records['classic']:
-            level_frame = ttk.LabelFrame(classic, text=level.title(), labelanchor='nw', padding=2)
-            level_records = iter(sorted(self.get('classic', level).items(), key=lambda x: x[1]))
-            for idx in range(5):
-                try:
-                    name, score = next(level_records)
-                    score = time.strftime("%H:%M:%S", time.gmtime(score))
-                except StopIteration:
-                    name, score = 'None', ''
-                ttk.Label(level_frame, text=name, width=24, relief='sunken', padding=2).grid(row=idx, column=0)
-                ttk.Label(level_frame, text=score, width=12, relief='sunken', anchor='center', padding=2
-                          ).grid(row=idx, column=1)
-            level_frame.pack()
-        classic.grid(row=1, column=0, sticky=('w', 's', 'n'))
-
-        # The champions of the challenge mode
-        challenge = ttk.LabelFrame(hall, text='Challenge Mode', labelanchor='n', padding=4)
-        for level in self.records['challenge']:
-            level_frame = ttk.LabelFrame(challenge, text=level.title(), labelanchor='nw', padding=2)
-            level_records = iter(sorted(self.get('challenge', level).items(), key=lambda x: x[1], reverse=True))
-            for idx in range(5):
-                try:
-                    name, score = next(level_records)
-                except StopIteration:
-                    name, score = 'None', ''
-                ttk.Label(level_frame, text=name, width=24, relief='sunken', padding=2).grid(row=idx, column=0)
-                ttk.Label(level_frame, text=score, width=12, relief='sunken', anchor='center', padding=2
-                          ).grid(row=idx, column=1)
-            level_frame.pack()
-        challenge.grid(row=1, column=1, sticky=('e', 's', 'n'))
+                  ).grid(row=0, columnspan=3, sticky=('e', 'w'), pady=4)
+
+        # The champions of the classic mode (at the left), of the challenge mode and of the endless mode (at the right)
+        for column, (mode, sticky) in enumerate((('classic', 'w'), ('challenge', 'n'), ('endless', 'e'))):
+            mode_frame = ttk.LabelFrame(hall, text=f'{mode.title()} Mode', labelanchor='n', padding=4)
+            for level in LEVELS:
+                level_frame = ttk.LabelFrame(mode_frame, text=level.title(), labelanchor='nw', padding=2)
+                table = self.tables[(mode, level)] = []
+                for idx in range(RecordStore.TOP):
+                    name = ttk.Label(level_frame, width=24, relief='sunken', padding=2)
+                    name.grid(row=idx, column=0)
+                    score = ttk.Label(level_frame, width=12, relief='sunken', anchor='center', padding=2)
+                    score.grid(row=idx, column=1)
+                    # the won classic games show their efficiency too, in 3BV per second
+                    efficiency = None
+                    if mode == 'classic':
+                        efficiency = ttk.Label(level_frame, width=12, relief='sunken', anchor='center', padding=2)
+                        efficiency.grid(row=idx, column=2)
+                    table.append((name, score, efficiency))
+                level_frame.pack()
+                self.patch(mode, level)
+            mode_frame.grid(row=1, column=column, sticky=(sticky, 's', 'n'))
         hall.pack()
 
-    def update(self, score: int, c_mode=False):
+    def patch(self, mode: str, level: str):
+        """
+        Refill the table of a single mode-level in the Hall of Fame window, if it was built.
+        """
+        if (mode, level) not in self.tables:
+            return
+        level_records = iter(self.store.top(mode, level))
+        for name_label, score_label, efficiency_label in self.tables[(mode, level)]:
+            try:
+                name, score, efficiency = next(level_records)
+                if mode == 'classic':
+                    score = time.strftime("%H:%M:%S", time.gmtime(score))
+            except StopIteration:
+                name, score, efficiency = 'None', '', None
+            name_label.configure(text=name)
+            score_label.configure(text=score)
+            if efficiency_label is not None:
+                efficiency_label.configure(text='' if efficiency is None else f'{efficiency:.2f} 3BV/s')
+
+    def update(self, score: int, efficiency: float = None):
         """
-        Updating the records with a new record. If there are more than 5 records per mode-level: dispose the lesser one.
-        This method is blind to whenever there is a new record or to the game mode, and it's up to the Game class to
-        call it properly.
+        Updating the records with a new record, and its efficiency if it has one. All the records are kept, and the
+        Hall of Fame shows the best 5 of every mode-level. This method is blind to whenever there is a new record, and
+        it's up to the Game class to call it properly.
         """
-        mode_level_records = self.records[self.root.mode.get()].get(self.root.level.get())
+        mode, level = self.root.mode.get(), self.root.level.get()
+        names = self.get(mode, level)
         name = askstring(title='New record!', prompt='Insert the winner name:')
-        while name in mode_level_records:
+        while name in names:
             name = askstring(title="Be Original", prompt="Choose other winner name:")
-        if mode_level_records is not None:
-            mode_level_records[name] = score
-
-        # removing the lesser record from the records
-        if len(mode_level_records) > 5:
-            func = min if c_mode else max
-            out = func(mode_level_records.items(), key=lambda x: x[1])[0]
-            mode_level_records.pop(out)
+        if name is not None:
+            self.store.add(mode, level, name, score, efficiency)
+            self.patch(mode, level)
 
     def get(self, mode, level) -> dict:
         """
-        Return a reference of the setting game's records
+        Return the top records of the setting game, by their names
+        """
+        return {name: score for name, score, _ in self.store.top(mode, level)}
+
+    def best(self, mode, level):
+        """
+        Return the best record of the setting game, or None if there isn't any
         """
-        return self.records[mode].get(level)
+        return self.store.best(mode, level)
 
     def reset(self):
         """
         Reset the records. No going back if you chose OK.
         """
         if msg.askokcancel('reset records', message="Are you sure?\nAll previous records will be deleted"):
-            self.records = {'classic': dict(easy={}, normal={}, hard={}),
-                            'challenge': dict(easy={}, normal={}, hard={})}
+            self.store.reset()
+            for mode, level in self.tables:
+                self.patch(mode, level)
 
 
-def helper(root):
+@lru_cache(maxsize=1)
+def help_text() -> tuple:
     """
-    Show help window, which contains the readme-file data.
+    Read the readme-file once, and return the title and the body of the help window.
     """
     try:
         with open('README.md') as file:
-            title = 'Game Help'
-            body = file.read()
+            return 'Game Help', file.read()
     except FileNotFoundError:
-        title = 'No help here'
-        body = """Can't find the readme file.
+        return 'No help here', """Can't find the readme file.
 Make sure you downloaded it and placed
 it in the same directory as the rest of the game's files"""
 
+
+def helper(root):
+    """
+    Show help window, which contains the readme-file data.
+    """
+    title, body = help_text()
     pop = tk.Toplevel(root)
     pop.resizable(False, False)
     pop.title(title)
@@ -0,0 +1,98 @@
+"""
+Load test of the game server: many concurrent sessions, each one playing games by random moves as fast as the server
+replies, for a given time. It reports the moves per second and the percentiles of the move latency (the round trip of
+a request and its reply):
+root> python server.py &
+root> python loadtest.py --sessions 1000 --seconds 10 --output loadtest.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from random import Random
+from time import perf_counter
+
+
+async def player(connect, level: str, seconds: float, rng: Random, latencies: list) -> dict:
+    """
+    Play classic games on a session until the time is up, and add the latency of every move to the list.
+    """
+    reader, writer = await connect()
+
+    async def request(message: dict) -> dict:
+        writer.write(json.dumps(message).encode() + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    deadline = perf_counter() + seconds
+    stats = dict(games=0, wins=0, moves=0, errors=0)
+    while perf_counter() < deadline:
+        board = await request(dict(op='new', mode='classic', level=level, name='loadtest'))
+        closed = list(range(board['rows'] * board['columns']))
+        rng.shuffle(closed)
+        stats['games'] += 1
+        while closed and perf_counter() < deadline:
+            cell = closed.pop()
+            tic = perf_counter()
+            reply = await request(dict(op='open', cell=cell))
+            latencies.append(perf_counter() - tic)
+            stats['moves'] += 1
+            if reply['event'] == 'error':
+                stats['errors'] += 1
+                break
+            opened = {index for index, _ in reply['cells']}
+            if opened:
+                closed = [index for index in closed if index not in opened]
+            if 'over' in reply:
+                stats['wins'] += reply['over']['won']
+                break
+    writer.close()
+    return stats
+
+
+async def run(args) -> dict:
+    if args.unix is not None:
+        def connect():
+            return asyncio.open_unix_connection(args.unix)
+    else:
+        def connect():
+            return asyncio.open_connection(args.host, args.port)
+
+    latencies = []
+    tic = perf_counter()
+    results = await asyncio.gather(*(player(connect, args.level, args.seconds, Random(args.seed + n), latencies)
+                                     for n in range(args.sessions)))
+    elapsed = perf_counter() - tic
+
+    total = {key: sum(stats[key] for stats in results) for key in results[0]}
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return dict(sessions=args.sessions, level=args.level, seconds=round(elapsed, 3), **total,
+                moves_per_second=round(total['moves'] / elapsed, 1),
+                latency_ms={name: round(quantiles[q - 1] * 1e3, 3) for name, q in (('p50', 50), ('p90', 90),
+                                                                                  ('p99', 99))},
+                max_latency_ms=round(latencies[-1] * 1e3, 3) if latencies else None)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Load test the game server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='connect to a Unix socket instead of TCP')
+    parser.add_argument('--sessions', type=int, default=100, help='concurrent game sessions')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--level', choices=('easy', 'normal', 'hard'), default='easy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the report to a json file')
+    args = parser.parse_args(args)
+
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        print(f'{key:>16}: {value}')
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent=4)
+
+
+if __name__ == '__main__':
+    main()
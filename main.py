@@ -4,8 +4,41 @@ Run this file the command file with the command:
 root> python main.py
 and play with joy.
 """
+from time import perf_counter
+
+# the startup is measured from here, before the game modules are imported
+STARTED = perf_counter()
+
+import argparse
+
 from game import Game
+from telemetry import profiler
+
+
+def measure_startup(game: Game, imported: float, built: float) -> None:
+    """
+    Wait until the game window is shown and fully drawn (the first frame the user can play), print the time it took
+    and its phases, and close the game.
+    """
+    game.wait_visibility()
+    game.update_idletasks()
+    shown = perf_counter()
+    profiler.record('startup_us', (shown - STARTED) * 1e6)
+    print(f'imports: {(imported - STARTED) * 1e3:.1f} ms, game: {(built - imported) * 1e3:.1f} ms, '
+          f'first frame: {(shown - built) * 1e3:.1f} ms, total: {(shown - STARTED) * 1e3:.1f} ms')
+    game.destroy()
+
 
 if __name__ == '__main__':
-    game = Game()
-    game.mainloop()
+    imported = perf_counter()
+    parser = argparse.ArgumentParser(description='Our MineSweeper')
+    parser.add_argument('--profile', nargs='?', const='telemetry.json', metavar='FILE',
+                        help='record the latency of the game hot paths, and dump it to a json file on close')
+    parser.add_argument('--measure-startup', action='store_true',
+                        help='print the time until the game is ready to play, and exit')
+    args = parser.parse_args()
+    game = Game(profile=args.profile)
+    if args.measure_startup:
+        measure_startup(game, imported, perf_counter())
+    else:
+        game.mainloop()
@@ -0,0 +1,177 @@
+import json
+import sqlite3
+import threading
+from queue import SimpleQueue
+from time import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    level TEXT NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created REAL NOT NULL,
+    efficiency REAL
+);
+CREATE INDEX IF NOT EXISTS records_rank ON records (mode, level, score);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class RecordStore:
+    """
+    The RecordStore class keeps the full history of the records in a SQLite database, indexed by (mode, level, score),
+    so the top records of a level are a direct query. Classic records are times (lower is better), challenge records
+    are scores (higher is better). A won classic game also keeps its efficiency: the 3BV of its board per second.
+
+    The records are written by a background thread, each one in its own transaction, so a write is crash-safe and never
+    blocks the Tk event loop. The top records of each level are cached in memory and updated together with the write
+    request, so the Hall of Fame always shows the new record even before it is committed. A records.json file of the
+    earlier versions is migrated into the database the first time the store is opened.
+    """
+    TOP = 5
+
+    def __init__(self, path: str = 'records.db', legacy: str = 'records.json'):
+        self.path = path
+        self.legacy = legacy
+        self.connection = None
+        self.queue = None
+        self.thread = None
+        self.errors = []
+        # the top records by (mode, level), loaded on demand
+        self.cache = {}
+
+    @staticmethod
+    def order(mode: str) -> str:
+        return 'ASC' if mode == 'classic' else 'DESC'
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open the database on the first use, create its schema and migrate the json records file into it.
+        """
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path)
+            with self.connection:
+                self.connection.execute('PRAGMA journal_mode=WAL')
+                self.connection.executescript(SCHEMA)
+                columns = [row[1] for row in self.connection.execute('PRAGMA table_info(records)')]
+                if 'efficiency' not in columns:
+                    # a database of the earlier versions
+                    self.connection.execute('ALTER TABLE records ADD COLUMN efficiency REAL')
+                migrated = self.connection.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+                if migrated is None:
+                    self.migrate()
+        return self.connection
+
+    def migrate(self) -> None:
+        """
+        Copy the records of a records.json file (if there is one) into the database, once.
+        """
+        try:
+            with open(self.legacy) as fp:
+                legacy = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            legacy = {}
+        created = time()
+        rows = [(mode, level, name, score, created)
+                for mode, levels in legacy.items() for level, records in levels.items()
+                for name, score in records.items()]
+        self.connection.executemany('INSERT INTO records (mode, level, name, score, created) VALUES (?, ?, ?, ?, ?)',
+                                    rows)
+        self.connection.execute("INSERT INTO meta VALUES ('migrated', ?)", (self.legacy,))
+
+    def top(self, mode: str, level: str) -> list:
+        """
+        Return the top records of a mode-level, best first, in format of (name, score, efficiency).
+        """
+        if (mode, level) not in self.cache:
+            self.cache[(mode, level)] = self.connect().execute(
+                f'SELECT name, score, efficiency FROM records WHERE mode = ? AND level = ? '
+                f'ORDER BY score {self.order(mode)}, id LIMIT ?', (mode, level, self.TOP)).fetchall()
+        return self.cache[(mode, level)]
+
+    def best(self, mode: str, level: str):
+        """
+        Return the best score of a mode-level, or None if there are no records.
+        """
+        top = self.top(mode, level)
+        return top[0][1] if top else None
+
+    def history(self, mode: str, level: str) -> list:
+        """
+        Return all the records of a mode-level, best first, in format of (name, score, efficiency, created).
+        """
+        self.flush()
+        return self.connect().execute(
+            f'SELECT name, score, efficiency, created FROM records WHERE mode = ? AND level = ? '
+            f'ORDER BY score {self.order(mode)}, id', (mode, level)).fetchall()
+
+    def add(self, mode: str, level: str, name: str, score: int, efficiency: float = None) -> None:
+        """
+        Add a record: update the cached top records, and send the record to be written.
+        """
+        top = self.top(mode, level) + [(name, score, efficiency)]
+        top.sort(key=lambda record: record[1], reverse=mode != 'classic')
+        self.cache[(mode, level)] = top[:self.TOP]
+        self.submit('INSERT INTO records (mode, level, name, score, created, efficiency) VALUES (?, ?, ?, ?, ?, ?)',
+                    (mode, level, name, score, time(), efficiency))
+
+    def reset(self) -> None:
+        """
+        Delete all the records. The delete is waited for, so the next read of the top records doesn't find them.
+        """
+        self.cache = {}
+        self.submit('DELETE FROM records', ())
+        self.flush()
+
+    def submit(self, statement: str, parameters: tuple) -> None:
+        """
+        Send a statement to the writer thread, which is started on the first write.
+        """
+        self.connect()
+        if self.thread is None:
+            self.queue = SimpleQueue()
+            self.thread = threading.Thread(target=self.write, daemon=True)
+            self.thread.start()
+        self.queue.put((statement, parameters))
+
+    def write(self) -> None:
+        """
+        The writer thread: execute every statement in its own transaction.
+        """
+        connection = sqlite3.connect(self.path)
+        while True:
+            request = self.queue.get()
+            if request is None:
+                break
+            if isinstance(request, threading.Event):
+                request.set()
+                continue
+            try:
+                with connection:
+                    connection.execute(*request)
+            except sqlite3.Error as error:
+                self.errors.append(error)
+        connection.close()
+
+    def flush(self) -> None:
+        """
+        Wait until all the sent statements were written.
+        """
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+
+    def close(self) -> None:
+        """
+        Write all the sent statements, and close the database.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
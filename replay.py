@@ -0,0 +1,246 @@
+"""
+Replays of the played games. While the game runs, every board start, open, chord, flag, clock tick and game over is
+appended to a compact binary log by a background thread, so the app never waits on the disk. This file reads the logs
+back:
+root> python replay.py replays/20210101-120000.msr                  (summary of all the games of the log)
+root> python replay.py replays/20210101-120000.msr --game 3 --animate   (watch a game on the board)
+"""
+import argparse
+import os
+import struct
+import threading
+from queue import SimpleQueue
+from time import perf_counter, strftime
+
+from state import BoardState
+
+MAGIC = b'MSRP\x01'
+
+# the events kinds
+START, OPEN, FLAG, TICK, END, CHORD = range(6)
+
+# every event is its kind and its time (in seconds from the game start), followed by its own fields
+HEADER = struct.Struct('<Bd')
+FIELDS = {START: struct.Struct('<HHIIB'),     # rows, columns, n_mines, seed, safe_radius
+          OPEN: struct.Struct('<I'),          # cell index
+          FLAG: struct.Struct('<I'),          # cell index
+          TICK: struct.Struct('<i'),          # game clock
+          END: struct.Struct('<B'),           # won
+          CHORD: struct.Struct('<I')}         # cell index
+
+
+class Recorder:
+    """
+    The Recorder class appends the events of the played games to a binary log file. The events are packed on the
+    calling (UI) thread, which costs a few microseconds, and are written by a background thread with buffered writes.
+    The recorder is off until it is opened, and then every call is a cheap no-op.
+    """
+    def __init__(self):
+        self.path = None
+        self.queue = None
+        self.thread = None
+        self.started = None
+
+    def open(self, directory: str = 'replays') -> None:
+        """
+        Start recording into a new log file in the given directory, named by the current time. The file and its writer
+        thread are created by the first recorded game, so opening the recorder costs nothing at the app startup.
+        """
+        self.path = os.path.join(directory, strftime('%Y%m%d-%H%M%S') + '.msr')
+
+    def write(self, path: str) -> None:
+        """
+        The writer thread: append the packed events to the log, and flush it at the end of every game.
+        """
+        with open(path, 'ab', buffering=1 << 16) as fp:
+            if fp.tell() == 0:
+                fp.write(MAGIC)
+            while True:
+                record = self.queue.get()
+                if record is None:
+                    break
+                fp.write(record)
+                if record[0] == END:
+                    fp.flush()
+
+    def event(self, kind: int, *fields) -> None:
+        """
+        Record an event of the current game.
+        """
+        if self.queue is not None and self.started is not None:
+            self.queue.put(HEADER.pack(kind, perf_counter() - self.started) + FIELDS[kind].pack(*fields))
+
+    def start(self, model: BoardState) -> None:
+        """
+        Record the start of a game. The board is reproduced by its parameters and seed, together with the first opened
+        cell (which is the next event).
+        """
+        if self.path is None:
+            return
+        if self.queue is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.queue = SimpleQueue()
+            self.thread = threading.Thread(target=self.write, args=(self.path,), daemon=True)
+            self.thread.start()
+        self.started = perf_counter()
+        self.event(START, model.rows, model.columns, model.n_mines, model.seed, model.safe_radius)
+
+    def pause(self) -> None:
+        """
+        Stop recording the events until the next game start: after the end of a game, and for the games which the log
+        cannot replay.
+        """
+        self.started = None
+
+    def close(self) -> None:
+        """
+        Stop recording, and wait for the writer thread to write all the events.
+        """
+        if self.queue is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.queue = None
+        self.path = None
+
+
+def read(path: str) -> list:
+    """
+    Read a log file. A log cut in the middle of an event (its writer was killed while writing) is read up to its last
+    whole event, and so is a log that goes on with an unknown event kind.
+
+    :return: list of the games, each one a list of events in format of (kind, time, fields).
+    """
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'{path} is not a replay log')
+
+    games = []
+    offset = len(MAGIC)
+    while offset + HEADER.size <= len(data):
+        kind, time = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        if kind not in FIELDS or offset + FIELDS[kind].size > len(data):
+            break
+        fields = FIELDS[kind].unpack_from(data, offset)
+        offset += FIELDS[kind].size
+        if kind == START:
+            games.append([])
+        if games:
+            games[-1].append((kind, time, fields))
+    return games
+
+
+class Replay:
+    """
+    The Replay class rebuilds the positions of a recorded game, on a headless BoardState. The mines are placed on the
+    first open, by the recorded seed, exactly as in the played game.
+    """
+    def __init__(self, events: list):
+        if not events or events[0][0] != START:
+            raise ValueError('a game replay starts with a start event')
+        self.events = events
+        self.rows, self.columns, self.n_mines, self.seed, self.safe_radius = events[0][2]
+
+    def steps(self, model: BoardState):
+        """
+        Apply the events to a new board state, one by one.
+
+        :return: generator of the applied events, each one together with the list of the cells it opened or flagged.
+        """
+        for kind, time, fields in self.events[1:]:
+            changed = []
+            if kind == OPEN:
+                if not model.started:
+                    model.place_mines(fields[0])
+                changed = model.reveal(fields[0])
+            elif kind == CHORD:
+                changed = model.chord(fields[0])
+            elif kind == FLAG:
+                if model.toggle_flag(fields[0]) is not None:
+                    changed = [fields[0]]
+            yield (kind, time, fields), changed
+
+    def new_model(self) -> BoardState:
+        return BoardState(self.rows, self.columns, self.n_mines, seed=self.seed, safe_radius=self.safe_radius)
+
+    def position(self, n: int = None) -> BoardState:
+        """
+        Return the board state after the first n events (after all of them by default), at full speed.
+        """
+        model = self.new_model()
+        for _ in zip(range(len(self.events) if n is None else n), self.steps(model)):
+            pass
+        return model
+
+    def summary(self) -> dict:
+        """
+        Return the outline of the game: its board, its moves and its outcome, as rebuilt by the replay.
+        """
+        model = self.position()
+        ticks = [fields[0] for kind, _, fields in self.events if kind == TICK]
+        return dict(board=f'{self.rows}x{self.columns}/{self.n_mines}', seed=self.seed,
+                    opens=sum(kind == OPEN for kind, _, _ in self.events),
+                    flags=sum(kind == FLAG for kind, _, _ in self.events),
+                    chords=sum(kind == CHORD for kind, _, _ in self.events),
+                    seconds=round(self.events[-1][1], 3), clock=ticks[-1] if ticks else None,
+                    outcome='won' if model.won() else 'lost' if model.lost else 'unfinished')
+
+    def animate(self, view, delay: int = 200) -> None:
+        """
+        Show the game on a board view (of the same size), an event every delay milliseconds.
+        """
+        view.model = self.new_model()
+        steps = self.steps(view.model)
+
+        def step():
+            for (kind, _, _), changed in steps:
+                if changed:
+                    for index in changed:
+                        if kind != FLAG:
+                            view.paint(index)
+                        else:
+                            view.mark(index)
+                    if view.model.lost:
+                        view.show_mines()
+                    view.after(delay, step)
+                    return
+
+        view.after(delay, step)
+
+
+# the recorder of the app
+recorder = Recorder()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Replay recorded games.')
+    parser.add_argument('log')
+    parser.add_argument('--game', type=int, help='the game number in the log (from 1)')
+    parser.add_argument('--animate', action='store_true', help='watch the game on the board')
+    parser.add_argument('--delay', type=int, default=200, help='milliseconds between the animated events')
+    args = parser.parse_args(args)
+
+    games = read(args.log)
+    numbers = [args.game] if args.game else range(1, len(games) + 1)
+    tic = perf_counter()
+    for number in numbers:
+        print(number, Replay(games[number - 1]).summary())
+    print(f'{len(numbers)} games replayed in {perf_counter() - tic:.3f} seconds')
+
+    if args.animate and args.game:
+        import tkinter as tk
+        from board import CanvasBoard
+
+        replay = Replay(games[args.game - 1])
+        root = tk.Tk()
+        root.title(f'Replay of game {args.game}')
+        view = CanvasBoard(replay.rows, replay.columns, replay.n_mines, master=root)
+        view.stop()
+        view.pack()
+        replay.animate(view, args.delay)
+        root.mainloop()
+
+
+if __name__ == '__main__':
+    main()
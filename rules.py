@@ -0,0 +1,33 @@
+# board params by level
+LEVELS = {'easy': dict(rows=9, columns=9, n_mines=10),
+          'normal': dict(rows=16, columns=16, n_mines=40),
+          'hard': dict(rows=16, columns=36, n_mines=99)}
+
+# changes in the board params by level
+# (a round's board with a 3BV, the least clicks that clear it, under min_3bv is too trivial, and is rolled again)
+CHALLENGE = {'easy': dict(time=900, t_decrease=5, t_limit=300, d_mines=2, score=-1, min_3bv=8),
+             'normal': dict(time=600, t_decrease=5, t_limit=240, d_mines=1, score=-1, min_3bv=45),
+             'hard': dict(time=600, t_decrease=6, t_limit=180, d_mines=1, score=-1, min_3bv=130)}
+
+
+def harden(board_params: dict, challenge_params: dict):
+    """
+    Updating the board and challenge parameters in place, so the next challenge game will be harder, and count the
+    round to the score. The rules of the levels and of the challenge are kept apart from the GUI, so the headless tools
+    (the simulator and the server) follow the same rules without importing Tk.
+    """
+    # decrease time (with some limitations)
+    if challenge_params['time'] > challenge_params['t_limit']:
+        challenge_params['time'] -= challenge_params['t_decrease']
+
+    # increasing mines number each 2 or 4 rounds
+    if not challenge_params['score'] % challenge_params['d_mines']:
+        board_params['n_mines'] += 1
+
+    # increasing the number of rows or columns each 2 mines
+    if not challenge_params['score'] % (challenge_params['d_mines'] * 4):
+        board_params['rows'] += 1
+    elif not challenge_params['score'] % (challenge_params['d_mines'] * 2):
+        board_params['columns'] += 1
+
+    challenge_params['score'] += 1
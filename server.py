@@ -0,0 +1,252 @@
+"""
+Headless game server: many independent games over a TCP or a Unix socket, a game session per connection, with the
+levels, the challenge rules, the clock and the records of the app. The protocol is a JSON object per line; every
+request gets a single reply line, and a challenge round that runs out of time sends its game over by itself:
+  {"op": "new", "mode": "classic", "level": "easy", "name": "bot"}   ->  {"event": "board", "rows": 9, ...}
+  {"op": "open", "cell": 40}     (also "flag" and "chord")           ->  {"event": "cells", "cells": [[40, 0], ...]}
+The opened cells are sent as [index, hint] pairs (a hint of 9 is a mine), and the flags as [index, flagged] pairs, so
+a move costs the cells it changed and not the whole board. The load-test client is loadtest.py.
+root> python server.py --port 8765
+root> python server.py --unix /tmp/minesweeper.sock
+"""
+import argparse
+import asyncio
+import json
+
+from bitboard import BACKENDS
+from records import RecordStore
+from rules import CHALLENGE, LEVELS, harden
+
+# the longest request line; a longer one closes its connection
+MAX_LINE = 1 << 12
+MINE = 9
+# the pending connections queue, long enough for a crowd of clients which connect at once
+BACKLOG = 4096
+
+
+class Session:
+    """
+    The Session class is a single game of a connection: the same rules as the Game app, without the GUI. The clock is
+    not ticked: the game time is computed from the time of the first open, by the semantics of Game.tic, and only a
+    challenge round schedules a single timer, for its time limit. A session holds its board state and a few numbers,
+    and drops the board state when the game is over, so its memory is bounded by the board size.
+    """
+    __slots__ = ('server', 'writer', 'mode', 'level', 'name', 'board_params', 'challenge_params', 'model', 'started',
+                 'limit', 'timer')
+
+    def __init__(self, server: 'Server', writer: asyncio.StreamWriter):
+        self.server = server
+        self.writer = writer
+        self.mode = self.level = self.name = None
+        self.board_params = self.challenge_params = None
+        self.model = None
+        self.started = None
+        self.limit = None
+        self.timer = None
+
+    def send(self, message: dict) -> None:
+        self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    def dispatch(self, request: dict) -> dict:
+        """
+        Apply a request of the client, and return the reply.
+        """
+        op = request['op']
+        if op == 'new':
+            return self.new(request.get('mode', 'classic'), request.get('level', 'easy'),
+                            str(request.get('name', 'anonymous'))[:32])
+        if op in ('open', 'flag', 'chord'):
+            cell = request['cell']
+            # a bool is an int too, and a float cell (or an overflowing one) isn't a cell
+            if not isinstance(cell, int) or isinstance(cell, bool):
+                raise ValueError(f'a cell is an integer index, not {cell!r}')
+            return self.move(op, cell)
+        raise ValueError(f'unknown op {op!r}')
+
+    def new(self, mode: str, level: str, name: str) -> dict:
+        """
+        Start a new game, as Game.new_game does.
+        """
+        if mode not in ('classic', 'challenge') or level not in LEVELS:
+            raise ValueError(f'no {mode!r} game at level {level!r}')
+        self.mode, self.level, self.name = mode, level, name
+        self.board_params = LEVELS[level].copy()
+        self.challenge_params = CHALLENGE[level].copy()
+        return self.load()
+
+    def load(self) -> dict:
+        """
+        Load a new board with the current board parameters, as Game.classic and Game.challenge do, and return its
+        outline.
+        """
+        self.cancel()
+        options = dict(min_3bv=self.challenge_params['min_3bv']) if self.mode == 'challenge' else {}
+        self.model = self.server.backend(**self.board_params, **options)
+        self.started = None
+        board = dict(event='board', mode=self.mode, **self.board_params)
+        if self.mode == 'challenge':
+            self.limit = self.challenge_params['time']
+            board.update(time=self.limit, round=self.challenge_params['score'] + 2)
+            harden(self.board_params, self.challenge_params)
+        return board
+
+    def elapsed(self) -> int:
+        """
+        Return the game clock of Game.tic: the seconds since the first open, counted from 1 (the first tic).
+        """
+        if self.started is None:
+            return 0
+        return int(asyncio.get_running_loop().time() - self.started) + 1
+
+    def move(self, op: str, cell: int) -> dict:
+        """
+        Open, flag or chord a cell, and return the changed cells. The first move of a board opens a cell, which places
+        the mines and starts the clock.
+        """
+        model = self.model
+        if model is None:
+            raise ValueError('no game is on: start a new one')
+        if not 0 <= cell < model.size:
+            raise ValueError(f'no cell {cell} on a board of {model.size} cells')
+
+        if not model.started:
+            if op != 'open':
+                raise ValueError('the first move of a board opens a cell')
+            model.place_mines(cell)
+            loop = asyncio.get_running_loop()
+            self.started = loop.time()
+            if self.mode == 'challenge':
+                # Game.tic ends a challenge round when its clock drops below zero, after the round time is up
+                self.timer = loop.call_later(self.limit, self.timeout)
+
+        self.server.moves += 1
+        if op == 'flag':
+            flagged = model.toggle_flag(cell)
+            return dict(event='cells', flags=[] if flagged is None else [[cell, int(flagged)]], n_flags=model.n_flags)
+
+        opened = model.reveal(cell) if op == 'open' else model.chord(cell)
+        mines, counts = model.mines, model.counts
+        reply = dict(event='cells', cells=[[index, MINE if mines[index] else counts[index]] for index in opened])
+        if model.lost:
+            reply.update(self.over(False))
+        elif opened and model.won():
+            reply.update(self.over(True))
+        return reply
+
+    def over(self, won: bool) -> dict:
+        """
+        End the current board, as Game.over does: a won challenge round loads the next round, and a finished game is
+        checked for a new record.
+
+        :return: the game over fields of the reply.
+        """
+        if self.mode == 'challenge' and won:
+            return dict(next=self.load())
+
+        self.cancel()
+        model, self.model = self.model, None
+        efficiency = None
+        if self.mode == 'classic':
+            score = self.elapsed() if won else None
+            if won:
+                efficiency = model.bbbv / score
+        else:
+            score = self.challenge_params['score']
+        record = self.server.record(self.mode, self.level, self.name, score, efficiency)
+        return dict(over=dict(won=won, score=score, efficiency=efficiency, record=record, mines=model.mine_indices()))
+
+    def timeout(self) -> None:
+        """
+        The time limit of a challenge round is up: the game is lost.
+        """
+        self.timer = None
+        if self.model is not None and not self.writer.is_closing():
+            self.send(dict(event='timeout', **self.over(False)))
+
+    def cancel(self) -> None:
+        """
+        Cancel the timer of the challenge round, if there is one.
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+class Server:
+    """
+    The Server class serves the game sessions of all the connections on a single event loop, and keeps their records
+    in a RecordStore, as the Hall of Fame of the app does.
+    """
+    def __init__(self, backend: str = 'arrays', database: str = 'records.db'):
+        self.backend = BACKENDS[backend]
+        self.store = RecordStore(database)
+        self.sessions = 0
+        self.moves = 0
+
+    def record(self, mode: str, level: str, name: str, score, efficiency: float = None) -> bool:
+        """
+        Add the score (and its efficiency) to the records if it beats the best record of its mode-level, and return
+        whether it did.
+        """
+        if score is None:
+            return False
+        best = self.store.best(mode, level)
+        if best is not None and (score >= best if mode == 'classic' else score <= best):
+            return False
+        self.store.add(mode, level, name, score, efficiency)
+        return True
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve a connection: read the requests line by line, and write a reply to each one.
+        """
+        session = Session(self, writer)
+        self.sessions += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    session.send(session.dispatch(json.loads(line)))
+                except (ValueError, KeyError, TypeError) as error:
+                    session.send(dict(event='error', message=str(error)))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # a broken connection, or a request line longer than MAX_LINE
+            pass
+        finally:
+            session.cancel()
+            self.sessions -= 1
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765, unix: str = None) -> None:
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle, unix, limit=MAX_LINE, backlog=BACKLOG)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE, backlog=BACKLOG)
+        print('Serving on', ', '.join(str(sock.getsockname()) for sock in server.sockets))
+        async with server:
+            await server.serve_forever()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Serve many headless games over a socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='serve on a Unix socket instead of TCP')
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='arrays', help='the board-state backend')
+    parser.add_argument('--database', default='records.db', help='the records database')
+    args = parser.parse_args(args)
+
+    server = Server(args.backend, args.database)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.store.close()
+
+
+if __name__ == '__main__':
+    main()
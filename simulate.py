@@ -0,0 +1,227 @@
+"""
+Headless Monte Carlo simulator of the game. It plays many games of any level and mode across a process pool with a
+pluggable strategy, and reports the throughput, the win rate (or the challenge score) and the reveal statistics.
+Use it to tune the level and challenge parameters before shipping them:
+root> python simulate.py --mode challenge --level normal --games 2000 --t-decrease 4
+"""
+import argparse
+import json
+from collections import Counter
+from importlib import import_module
+from multiprocessing import Pool, cpu_count
+from random import Random
+from time import perf_counter
+from weakref import WeakKeyDictionary
+
+from bitboard import BACKENDS
+from rules import CHALLENGE, LEVELS, harden
+from solver import Solver
+from state import BoardState
+
+
+def random_strategy(model: BoardState, rng: Random) -> int:
+    """
+    Open a random closed cell which isn't flagged.
+    """
+    while True:
+        index = rng.randrange(model.size)
+        if not model.opened[index] and not model.flagged[index]:
+            return index
+
+
+def basic_strategy(model: BoardState, rng: Random) -> int:
+    """
+    Play by the single-cell rules of the hints: a hint which is satisfied by its flagged neighbors makes the rest of
+    its closed neighbors safe, and a hint that equals its closed neighbors makes them all mines (and they are flagged).
+    If no cell is certainly safe, open a random one.
+    """
+    if model.started:
+        changed = True
+        while changed:
+            changed = False
+            for index in range(model.size):
+                if not model.opened[index] or not model.counts[index]:
+                    continue
+                closed = [n for n in model.neighbors(index) if not model.opened[n] and not model.flagged[n]]
+                if not closed:
+                    continue
+                flagged = model.flags_around(index)
+                if model.counts[index] == flagged:
+                    return closed[0]
+                if model.counts[index] - flagged == len(closed):
+                    for neighbor in closed:
+                        model.toggle_flag(neighbor)
+                    changed = True
+    return random_strategy(model, rng)
+
+
+# the solver of each game played by the solver strategy
+SOLVERS = WeakKeyDictionary()
+
+
+def solver_strategy(model: BoardState, rng: Random) -> int:
+    """
+    Open the cell hinted by the solver: a certainly safe cell, or else the least risky one.
+    """
+    if not model.started:
+        return random_strategy(model, rng)
+    solver = SOLVERS.get(model)
+    if solver is None:
+        solver = SOLVERS[model] = Solver(model)
+    else:
+        solver.update()
+    answer = solver.hint()
+    return random_strategy(model, rng) if answer is None else answer[0]
+
+
+# strategies by name. Any other strategy is given as 'module:function', with the same signature
+STRATEGIES = {'random': random_strategy, 'basic': basic_strategy, 'solver': solver_strategy}
+
+
+def load_strategy(name: str):
+    """
+    Return the strategy function by its name, or by its 'module:function' path.
+    """
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module, _, function = name.partition(':')
+    return getattr(import_module(module), function)
+
+
+def play(board_params: dict, strategy, rng: Random, backend=BoardState, **options) -> tuple[bool, int, int]:
+    """
+    Play a single game to its end, on a board state of the given backend, with the given board options (min_3bv).
+
+    :return: the outcome, the number of moves and the number of opened cells.
+    """
+    model = backend(**board_params, **options, seed=rng.randrange(2 ** 32))
+    index = strategy(model, rng)
+    model.place_mines(index)
+    moves = 0
+    # a strategy that keeps choosing opened cells can't block the simulation
+    while moves < model.size:
+        model.reveal(index)
+        moves += 1
+        if model.lost or model.won():
+            break
+        index = strategy(model, rng)
+    return model.won(), moves, model.size - model.n_mines - model.closed_safe
+
+
+def play_challenge(board_params: dict, challenge_params: dict, strategy, rng: Random, click_time: float,
+                   max_rounds: int, backend=BoardState) -> tuple[int, int, int]:
+    """
+    Play a whole challenge game, a round after a round, by the rules of Game.challenge. Each move takes click_time
+    seconds of the round clock, and the game is over when a round is lost or its time is up.
+
+    :return: the score (number of won rounds), the number of moves and the number of opened cells.
+    """
+    board_params, challenge_params = board_params.copy(), challenge_params.copy()
+    total_moves = total_opened = 0
+    while challenge_params['score'] < max_rounds:
+        params = board_params.copy()
+        time = challenge_params['time']
+        harden(board_params, challenge_params)
+        won, moves, opened = play(params, strategy, rng, backend, min_3bv=challenge_params['min_3bv'])
+        total_moves += moves
+        total_opened += opened
+        if not won or moves * click_time > time:
+            break
+    return challenge_params['score'], total_moves, total_opened
+
+
+def simulate(task: tuple) -> dict:
+    """
+    Play a batch of games in a worker process, and return their summed statistics.
+    """
+    mode, board_params, challenge_params, strategy_name, backend, seed, games, click_time, max_rounds = task
+    strategy = load_strategy(strategy_name)
+    backend = BACKENDS[backend]
+    rng = Random(seed)
+    stats = dict(games=0, wins=0, moves=0, opened=0, scores=Counter())
+    for _ in range(games):
+        if mode == 'classic':
+            won, moves, opened = play(board_params, strategy, rng, backend)
+            stats['wins'] += won
+        else:
+            score, moves, opened = play_challenge(board_params, challenge_params, strategy, rng, click_time,
+                                                  max_rounds, backend)
+            stats['scores'][score] += 1
+        stats['games'] += 1
+        stats['moves'] += moves
+        stats['opened'] += opened
+    return stats
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Play many headless games and report their statistics.')
+    parser.add_argument('--mode', choices=('classic', 'challenge'), default='classic')
+    parser.add_argument('--level', choices=tuple(LEVELS), default='easy')
+    parser.add_argument('--strategy', default='basic', help="'random', 'basic', 'solver' or a 'module:function' path")
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='arrays', help='the board-state backend')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=cpu_count())
+    parser.add_argument('--batch', type=int, default=50, help='games per task sent to a worker')
+    parser.add_argument('--seed', type=int, default=0, help='base seed; the same seed plays the same games')
+    # board parameters overrides
+    parser.add_argument('--rows', type=int)
+    parser.add_argument('--columns', type=int)
+    parser.add_argument('--mines', type=int, dest='n_mines')
+    # challenge parameters overrides
+    parser.add_argument('--time', type=int)
+    parser.add_argument('--t-decrease', type=int)
+    parser.add_argument('--t-limit', type=int)
+    parser.add_argument('--d-mines', type=int)
+    parser.add_argument('--min-3bv', type=int)
+    parser.add_argument('--click-time', type=float, default=1.0, help='seconds of the challenge clock per move')
+    parser.add_argument('--max-rounds', type=int, default=1000)
+    parser.add_argument('--json', help='write the report to this json file too')
+    args = parser.parse_args(args)
+
+    board_params = LEVELS[args.level].copy()
+    board_params.update({key: getattr(args, key) for key in board_params if getattr(args, key) is not None})
+    challenge_params = CHALLENGE[args.level].copy()
+    challenge_params.update({key: getattr(args, key) for key in challenge_params
+                             if getattr(args, key, None) is not None})
+
+    tasks = []
+    for start in range(0, args.games, args.batch):
+        games = min(args.batch, args.games - start)
+        tasks.append((args.mode, board_params, challenge_params, args.strategy, args.backend, args.seed + start, games,
+                      args.click_time, args.max_rounds))
+
+    tic = perf_counter()
+    with Pool(args.processes) as pool:
+        results = pool.map(simulate, tasks)
+    elapsed = perf_counter() - tic
+
+    total = dict(games=0, wins=0, moves=0, opened=0, scores=Counter())
+    for stats in results:
+        for key in total:
+            total[key] += stats[key]
+    games = total['games']
+
+    report = dict(mode=args.mode, level=args.level, strategy=args.strategy, backend=args.backend, board=board_params,
+                  games=games,
+                  seconds=round(elapsed, 3), games_per_second=round(games / elapsed, 1),
+                  mean_moves=round(total['moves'] / games, 2), mean_opened=round(total['opened'] / games, 2))
+    if args.mode == 'classic':
+        report['win_rate'] = round(total['wins'] / games, 4)
+        report['opened_fraction'] = round(total['opened'] / games / (board_params['rows'] * board_params['columns']
+                                                                     - board_params['n_mines']), 4)
+    else:
+        scores = total['scores']
+        report['challenge'] = challenge_params
+        report['mean_score'] = round(sum(score * count for score, count in scores.items()) / games, 3)
+        report['max_score'] = max(scores)
+        report['scores'] = dict(sorted(scores.items()))
+
+    for key, value in report.items():
+        print(f'{key:>16}: {value}')
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump(report, fp, indent=4)
+
+
+if __name__ == '__main__':
+    main()
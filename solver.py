@@ -0,0 +1,247 @@
+from collections import defaultdict
+
+from state import BoardState
+
+
+class Solver:
+    """
+    The Solver class deduces the board from what the player can see: the hints of the opened cells. Every opened hint
+    is a constraint on its closed neighbors (the number of mines among them). The solver first propagates the simple
+    constraints (no mines left, or as many mines as closed neighbors), then splits the frontier into independent
+    components (closed cells which share no constraint) and enumerates the mine arrangements of each one, which gives
+    the cells that are certainly safe or certainly mined, and the mine probability of the others.
+
+    The solver is updated incrementally: the board reports the cells opened by each action, and the enumeration of a
+    component is cached by its constraints, so only the components that changed since the last answer are solved again.
+    Flags are the player's guesses, so they are ignored.
+    """
+    # components larger than this are not enumerated, and get an estimated probability instead; so are the components
+    # left when a hint has visited MAX_NODES nodes of enumeration, so a hint stays under a frame
+    MAX_VARIABLES = 24
+    MAX_NODES = 4000
+    CACHE_SIZE = 4096
+
+    def __init__(self, model: BoardState):
+        self.model = model
+        self.mines = set()
+        self.safe = set()
+        self.probabilities = {}
+        # the opened cells with hints that may still constrain closed neighbors
+        self.frontier = set()
+        self.cache = {}
+        # the enumeration nodes left to the current hint
+        self.budget = self.MAX_NODES
+        self.seen = bytearray(model.size)
+        self.update()
+
+    def update(self, opened: list = None) -> None:
+        """
+        Inform the solver of newly opened cells. Without a list, the opened cells are found by comparing the board
+        with the cells the solver had already seen.
+        """
+        if opened is None:
+            opened = [index for index in range(self.model.size) if self.model.opened[index] and not self.seen[index]]
+        for index in opened:
+            self.seen[index] = 1
+            self.safe.discard(index)
+            if self.model.counts[index] and not self.model.mines[index]:
+                self.frontier.add(index)
+
+    def constraints(self) -> dict:
+        """
+        Return the current constraints by their cells: the closed neighbors whose state is still unknown, and the
+        number of mines among them.
+        """
+        model, mines, safe = self.model, self.mines, self.safe
+        constraints = {}
+        for cell in list(self.frontier):
+            neighbors = model.neighbors(cell)
+            variables = tuple(n for n in neighbors if not model.opened[n] and n not in mines and n not in safe)
+            if not variables:
+                self.frontier.discard(cell)
+                continue
+            constraints[cell] = (variables, model.counts[cell] - sum(n in mines for n in neighbors))
+        return constraints
+
+    def solve(self) -> None:
+        """
+        Find all the certainly safe and certainly mined cells, and the mine probabilities of the rest of the frontier.
+        """
+        self.budget = self.MAX_NODES
+        while True:
+            constraints = self.constraints()
+
+            # simple propagation
+            found = False
+            for variables, value in constraints.values():
+                if value == 0:
+                    self.safe.update(variables)
+                    found = True
+                elif value == len(variables):
+                    self.mines.update(variables)
+                    found = True
+            if found:
+                continue
+
+            # enumeration of the independent components
+            components = [self.enumerate(component) for component in self.components(constraints.values())]
+            for variables, solutions, counts in components:
+                total = sum(solutions.values())
+                if not total:
+                    continue
+                for position, cell in enumerate(variables):
+                    hits = sum(k_counts[position] for k_counts in counts.values())
+                    if hits == 0:
+                        self.safe.add(cell)
+                        found = True
+                    elif hits == total:
+                        self.mines.add(cell)
+                        found = True
+            if not found:
+                break
+        self.estimate(components, constraints)
+
+    @staticmethod
+    def components(constraints) -> list:
+        """
+        Split the constraints into independent groups, which share no variables.
+        """
+        parent = {}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        for variables, _ in constraints:
+            for cell in variables:
+                parent.setdefault(cell, cell)
+            root = find(variables[0])
+            for cell in variables[1:]:
+                parent[find(cell)] = root
+
+        groups = defaultdict(list)
+        for constraint in constraints:
+            groups[find(constraint[0][0])].append(constraint)
+        return list(groups.values())
+
+    def enumerate(self, component: list) -> tuple:
+        """
+        Enumerate all the mine arrangements of a component which satisfy its constraints. The result is cached by the
+        constraints of the component.
+
+        :return: the component variables; the number of arrangements by their number of mines; and, by the number of
+        mines, the number of arrangements in which each variable is a mine.
+        """
+        component = tuple(sorted(component))
+        if component in self.cache:
+            return self.cache[component]
+
+        # the constraints are sorted by their cells, so the variables are ordered along the board and the constraints
+        # are closed as early as possible
+        by_variable = defaultdict(list)
+        for c, (variables, _) in enumerate(component):
+            for cell in variables:
+                by_variable[cell].append(c)
+        order = list(dict.fromkeys(cell for variables, _ in component for cell in variables))
+
+        solutions = defaultdict(int)
+        counts = {}
+        if len(order) <= self.MAX_VARIABLES:
+            need = [value for _, value in component]
+            left = [len(variables) for variables, _ in component]
+            links = [by_variable[cell] for cell in order]
+            assignment = [0] * len(order)
+
+            def assign(position, mines) -> bool:
+                # return False when the hint runs out of its nodes budget
+                self.budget -= 1
+                if self.budget < 0:
+                    return False
+                if position == len(order):
+                    # a whole arrangement costs a node per variable
+                    self.budget -= position
+                    solutions[mines] += 1
+                    k_counts = counts.setdefault(mines, [0] * len(order))
+                    for p, value in enumerate(assignment):
+                        k_counts[p] += value
+                    return True
+                for value in (0, 1):
+                    for c in links[position]:
+                        need[c] -= value
+                        left[c] -= 1
+                    done = True
+                    if all(0 <= need[c] <= left[c] for c in links[position]):
+                        assignment[position] = value
+                        done = assign(position + 1, mines + value)
+                    for c in links[position]:
+                        need[c] += value
+                        left[c] += 1
+                    if not done:
+                        return False
+                assignment[position] = 0
+                return True
+
+            if not assign(0, 0):
+                # out of budget: the component is estimated, as a component too large to enumerate, and isn't cached
+                # so a later hint enumerates it again
+                return order, {}, {}
+
+        if len(self.cache) >= self.CACHE_SIZE:
+            self.cache.clear()
+        self.cache[component] = result = (order, dict(solutions), counts)
+        return result
+
+    def estimate(self, components: list, constraints: dict) -> None:
+        """
+        Compute the mine probability of every closed cell of unknown state. The arrangements of each component are
+        weighted by the density of the remaining mines, and the cells out of the frontier share the mines that the
+        frontier doesn't hold.
+        """
+        model = self.model
+        closed = [index for index in range(model.size)
+                  if not model.opened[index] and index not in self.mines and index not in self.safe]
+        remaining = model.n_mines - len(self.mines)
+        density = min(max(remaining / len(closed), 1e-6), 1 - 1e-6) if closed else 0
+        ratio = density / (1 - density) if closed else 0
+
+        probabilities = {}
+        for variables, solutions, counts in components:
+            weight = sum(n * ratio ** k for k, n in solutions.items())
+            if not weight:
+                # a component too large to enumerate: use the tightest of its constraints
+                for cells, value in constraints.values():
+                    for cell in cells:
+                        if cell in variables:
+                            probabilities[cell] = max(probabilities.get(cell, 0), value / len(cells))
+                continue
+            for position, cell in enumerate(variables):
+                probabilities[cell] = sum(k_counts[position] * ratio ** k for k, k_counts in counts.items()) / weight
+
+        others = [index for index in closed if index not in probabilities]
+        if others:
+            # the components are weighted apart, so they may expect more mines than are left: the estimate is kept
+            # above zero, as a probability of zero is only for the cells the solver proved safe
+            expected = sum(probabilities.values())
+            rest = min(max((remaining - expected) / len(others), 1e-6), 1)
+            for index in others:
+                probabilities[index] = rest
+        self.probabilities = probabilities
+
+    def hint(self):
+        """
+        Return the best cell to open: a cell that is certainly safe if there is any, or else the cell with the lowest
+        mine probability, together with its probability. A flagged cell can't be opened, so it is never the answer.
+        Return None if there are no closed, unflagged cells.
+        """
+        self.solve()
+        opened, flagged = self.model.opened, self.model.flagged
+        for index in sorted(self.safe):
+            if not opened[index] and not flagged[index]:
+                return index, 0.0
+        candidates = [index for index in self.probabilities if not flagged[index]]
+        if not candidates:
+            return None
+        index = min(candidates, key=self.probabilities.get)
+        return index, self.probabilities[index]
@@ -0,0 +1,290 @@
+from array import array
+from functools import lru_cache
+from random import Random, randrange
+
+
+@lru_cache(maxsize=16)
+def adjacency(rows: int, columns: int) -> tuple[array, array]:
+    """
+    Return the neighbor table of a board size, in a compressed sparse rows layout: the neighbors of cell i are
+    indices[offsets[i]:offsets[i + 1]]. The table is built once per board size and shared by all the boards (and the
+    rounds) of that size, so finding the neighbors of a cell is a single slice, with no bounds checks at the edges.
+    """
+    offsets = array('I', [0])
+    indices = array('I')
+    for row in range(rows):
+        rows_around = range(max(row - 1, 0), min(row + 2, rows))
+        for column in range(columns):
+            indices.extend(r * columns + c
+                           for r in rows_around
+                           for c in range(max(column - 1, 0), min(column + 2, columns))
+                           if r != row or c != column)
+            offsets.append(len(indices))
+    return offsets, indices
+
+
+class BoardState:
+    """
+    The BoardState class holds the rules of a single game board, with no GUI attached. Cells are addressed by a flat
+    index (row * columns + column), and the mines, the neighboring-mines hints, the opened cells and the flagged cells
+    are all kept in flat arrays of that size. The Board widget is only a view over this state, so every rule of the
+    game can run (and be tested or timed) without a display.
+
+    The mines are placed by a random generator of the board's own, so a board is reproduced exactly by its seed. The
+    first opened cell is always clear, together with the cells up to safe_radius rows/columns around it. A board whose
+    3BV (the least clicks that clear it) is under min_3bv is re-rolled with a new seed, drawn from its seed.
+    """
+    # the most layouts rolled for a board with a minimal 3BV
+    ATTEMPTS = 100
+
+    def __init__(self, rows: int, columns: int, n_mines: int, seed: int = None, safe_radius: int = 0,
+                 min_3bv: int = 0):
+        if not 0 <= n_mines < rows * columns:
+            raise ValueError(f'a {rows}x{columns} board cannot hold {n_mines} mines')
+        self.rows = rows
+        self.columns = columns
+        self.n_mines = n_mines
+        self.size = rows * columns
+        self.seed = randrange(2 ** 32) if seed is None else seed
+        self.safe_radius = safe_radius
+        self.min_3bv = min_3bv
+        self.offsets, self.adjacent = adjacency(rows, columns)
+
+        self.mines = bytearray(self.size)
+        self.counts = bytearray(self.size)
+        self.opened = bytearray(self.size)
+        self.flagged = bytearray(self.size)
+        self.n_flags = 0
+        # the game is won when this counter of the closed cells which aren't mines hits zero
+        self.closed_safe = self.size - n_mines
+        # the opening regions, labeled when the mines are placed
+        self.labels = None
+        self.regions = []
+        # the labels of the regions that a flag cut, when they were opened in part
+        self.cut = set()
+        self.bbbv = 0
+        self.started = False
+        self.lost = False
+
+    def index(self, loc: tuple[int, int]) -> int:
+        """
+        Helper method to convert a position, in format of (row, column), to the flat index of the cell
+        """
+        return loc[0] * self.columns + loc[1]
+
+    def loc(self, index: int) -> tuple[int, int]:
+        """
+        Helper method to convert a flat index of a cell to its position, in format of (row, column)
+        """
+        return divmod(index, self.columns)
+
+    def neighbors(self, index: int) -> array:
+        """
+        Return the flat indices of the cells surrounding the given cell, not included the cell itself
+        """
+        return self.adjacent[self.offsets[index]:self.offsets[index + 1]]
+
+    def flags_around(self, index: int) -> int:
+        """
+        Return the number of flagged cells surrounding the given cell
+        """
+        flagged = self.flagged
+        return sum(flagged[neighbor] for neighbor in self.adjacent[self.offsets[index]:self.offsets[index + 1]])
+
+    def mine_indices(self) -> list[int]:
+        """
+        Return the flat indices of all the mines on the board
+        """
+        return [index for index in range(self.size) if self.mines[index]]
+
+    def safe_zone(self, first: int) -> list[int]:
+        """
+        Return the sorted indices of the cells which are kept clear of mines around the first opened cell. The zone
+        shrinks when the board is too dense to keep it all clear, down to the first cell alone.
+        """
+        row, column = divmod(first, self.columns)
+        for radius in range(self.safe_radius, -1, -1):
+            zone = [r * self.columns + c
+                    for r in range(max(row - radius, 0), min(row + radius + 1, self.rows))
+                    for c in range(max(column - radius, 0), min(column + radius + 1, self.columns))]
+            if self.size - len(zone) >= self.n_mines:
+                return zone
+        return [first]
+
+    def sample_mines(self, first: int) -> list[int]:
+        """
+        Return the mine locations of the board by its seed. The mines are sampled without replacement out of the cells
+        outside the safe zone around the first opened cell, so the sampling takes a linear time however dense the board
+        is.
+        """
+        zone = self.safe_zone(first)
+        mines = []
+        for index in Random(self.seed).sample(range(self.size - len(zone)), self.n_mines):
+            # skip over the safe cells: the k-th sampled cell is the k-th cell outside the zone
+            for safe in zone:
+                if index >= safe:
+                    index += 1
+            mines.append(index)
+        return mines
+
+    def place_mines(self, first: int) -> None:
+        """
+        Set the mine locations, keeping the safe zone around the first opened cell clear, count the neighboring mines
+        of every cell and label the opening regions. A layout with a 3BV under the minimum is rolled again, up to
+        ATTEMPTS layouts, and the last one is kept.
+        """
+        for attempt in range(self.ATTEMPTS):
+            if attempt:
+                self.mines = bytearray(self.size)
+                self.seed = Random(self.seed).randrange(2 ** 32)
+            for index in self.sample_mines(first):
+                self.mines[index] = 1
+            self.count_mines()
+            self.label_regions()
+            if self.bbbv >= self.min_3bv:
+                break
+        self.started = True
+
+    def count_mines(self) -> None:
+        """
+        Compute the neighboring-mines hint of every cell at once, as a 3x3 box sum over the mines mask. The box sum is
+        separable: first every row is summed with its shifted copies to the left and right, then every row of these
+        sums is added to the rows above and below it. The mine in the cell itself is subtracted at the end.
+        """
+        columns = self.columns
+        zeros = bytes(columns)
+        mask = [self.mines[start:start + columns] for start in range(0, self.size, columns)]
+
+        # horizontal pass, padded with an empty row above and below the board
+        horizontal = [zeros]
+        for row in mask:
+            padded = b'\0' + row + b'\0'
+            horizontal.append(bytes(map(sum, zip(padded, padded[1:], padded[2:]))))
+        horizontal.append(zeros)
+
+        # vertical pass
+        for row, mines in enumerate(mask):
+            start = row * columns
+            self.counts[start:start + columns] = bytes(
+                above + middle + below - mine
+                for above, middle, below, mine in zip(horizontal[row], horizontal[row + 1], horizontal[row + 2], mines))
+
+    def label_regions(self, mines: bytes = None) -> None:
+        """
+        Label the opening regions of the board with a connected-component pass: every region of empty cells (zero
+        hints) connected to each other, together with the hint cells around it, is what opening any of its empty cells
+        opens. The region of an empty cell is regions[labels[index]], in the order the cells would be explored from
+        its first cell. A hint cell may border several regions; it is labeled by the last of them, and a label of 0
+        means no region. The same pass gives the 3BV of the board: the least clicks that clear it, a click per region
+        and a click per hint cell out of all the regions. The mines are read from the board, or from a flat copy of
+        them.
+        """
+        counts, offsets, adjacent = self.counts, self.offsets, self.adjacent
+        mines = self.mines if mines is None else mines
+        labels = array('I', bytes(4 * self.size))
+        regions = [[]]
+        for start in range(self.size):
+            if counts[start] or mines[start] or labels[start]:
+                continue
+            label = len(regions)
+            labels[start] = label
+            region = [start]
+            for current in region:
+                if counts[current]:
+                    continue
+                for neighbor in adjacent[offsets[current]:offsets[current + 1]]:
+                    if labels[neighbor] != label:
+                        labels[neighbor] = label
+                        region.append(neighbor)
+            regions.append(region)
+        self.labels, self.regions = labels, regions
+        self.bbbv = len(regions) - 1 + sum(1 for index in range(self.size)
+                                           if counts[index] and not mines[index] and not labels[index])
+
+    def toggle_flag(self, index: int):
+        """
+        Flag or de-flag a closed cell. Return the new flag state of the cell, or None if the cell is already opened.
+        """
+        if self.opened[index]:
+            return None
+        self.flagged[index] ^= 1
+        self.n_flags += 1 if self.flagged[index] else -1
+        return bool(self.flagged[index])
+
+    def reveal(self, index: int) -> list[int]:
+        """
+        Open a closed, unflagged cell. If the cell is a mine the game is lost; if no mines surround it, all the cells
+        that are connected to it through empty cells are opened too. The opening region is looked up by the label of
+        the cell; only when a flag is inside it, or was when a part of it was opened before, the region is explored
+        with an explicit queue (stopping at the flags), so its size isn't limited by the recursion depth of the
+        interpreter.
+
+        :return: list of the indices of the cells that were opened by this action, in the order they were opened.
+        """
+        if self.opened[index] or self.flagged[index]:
+            return []
+
+        opened, flagged, counts = self.opened, self.flagged, self.counts
+        opened[index] = 1
+        if self.mines[index]:
+            self.lost = True
+            return [index]
+
+        if not counts[index] and self.labels is not None:
+            # the whole opening region is known since the mines were placed, unless a flag cuts through it, or did cut
+            # it before (then the part opened before may not be connected to this cell any more, once the flag is off)
+            label = self.labels[index]
+            region = self.regions[label]
+            if label not in self.cut and (not self.n_flags or not any(map(flagged.__getitem__, region))):
+                region = [cell for cell in region if not opened[cell] or cell == index]
+                for cell in region:
+                    opened[cell] = 1
+                self.closed_safe -= len(region)
+                return region
+            self.cut.add(label)
+
+        offsets, adjacent = self.offsets, self.adjacent
+        region = [index]
+        self.closed_safe -= 1
+        # the region list is also the queue: every cell is appended once, when it is opened
+        for current in region:
+            if counts[current]:
+                continue
+            for neighbor in adjacent[offsets[current]:offsets[current + 1]]:
+                if not opened[neighbor] and not flagged[neighbor]:
+                    opened[neighbor] = 1
+                    region.append(neighbor)
+        self.closed_safe -= len(region) - 1
+        return region
+
+    def chord(self, index: int) -> list[int]:
+        """
+        Open all the closed, unflagged neighbors of an opened hint cell, if as many of its neighbors are flagged as its
+        hint. A wrong flag opens a mine, and the game is lost.
+
+        :return: list of the indices of the cells that were opened by this action.
+        """
+        if not self.opened[index] or not self.counts[index] or self.flags_around(index) != self.counts[index]:
+            return []
+        region = []
+        for neighbor in self.neighbors(index):
+            region.extend(self.reveal(neighbor))
+        return region
+
+    def close(self, cells) -> None:
+        """
+        Close opened cells again, to undo the action that opened them. Closing an opened mine takes the lose back.
+        """
+        opened, mines = self.opened, self.mines
+        for index in cells:
+            opened[index] = 0
+            if mines[index]:
+                self.lost = False
+            else:
+                self.closed_safe += 1
+
+    def won(self) -> bool:
+        """
+        check if all the cells that aren't mines were opened
+        """
+        return not self.lost and self.closed_safe == 0
@@ -0,0 +1,100 @@
+import json
+import os
+from contextlib import contextmanager
+from time import perf_counter
+
+# set this environment variable to a file name (or to 1, for the default name) to profile the game
+ENVIRON = 'MINESWEEPER_PROFILE'
+
+
+class Histogram:
+    """
+    A histogram of positive values in power-of-2 buckets, so it takes a constant memory however many values were
+    recorded. Bucket n holds the values in the range [2**(n-1), 2**n).
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        bucket = int(value).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Return the upper bound of the bucket that holds the given fraction of the values.
+        """
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= fraction * self.count:
+                return 2 ** bucket
+        return 0
+
+    def summary(self) -> dict:
+        return dict(count=self.count, mean=self.total / self.count if self.count else 0, min=self.min, max=self.max,
+                    p50=self.percentile(0.5), p90=self.percentile(0.9), p99=self.percentile(0.99),
+                    buckets={f'<{2 ** bucket}': n for bucket, n in sorted(self.buckets.items())})
+
+
+class Telemetry:
+    """
+    The Telemetry class is an opt-in profiler of the game hot paths. It is off by default, and then every call is a
+    cheap no-op. When it is enabled (by Game, from a command-line flag or the MINESWEEPER_PROFILE environment
+    variable), it keeps a histogram per measured name: times in microseconds, or counts, and dumps them all to a json
+    file when the app is closed.
+    """
+    def __init__(self):
+        self.path = None
+        self.histograms = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def enable(self, path: str = None) -> None:
+        """
+        Enable the profiler, with the json file to dump into. Without a file name, the environment variable is used.
+        """
+        path = path or os.environ.get(ENVIRON)
+        if path:
+            self.path = 'telemetry.json' if path == '1' else path
+
+    def record(self, name: str, value: float) -> None:
+        """
+        Add a value to the histogram of the given name.
+        """
+        if self.path is not None:
+            self.histograms.setdefault(name, Histogram()).add(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """
+        Measure the time of the with-block, in microseconds.
+        """
+        if self.path is None:
+            yield
+            return
+        tic = perf_counter()
+        yield
+        self.record(name, (perf_counter() - tic) * 1e6)
+
+    def dump(self) -> None:
+        """
+        Write the summary of all the histograms to the json file.
+        """
+        if self.path is not None:
+            with open(self.path, 'w') as fp:
+                json.dump({name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                          fp, indent=4)
+
+
+# the profiler of the app
+profiler = Telemetry()
@@ -0,0 +1,49 @@
+"""
+Tests of the bit board backend, against the byte array one:
+root> python -m unittest test_bitboard
+"""
+import unittest
+from itertools import chain
+from random import Random
+
+import replay
+from bitboard import BitBoardState
+from state import BoardState
+from test_headless import SIZES, play, random_moves
+
+
+class BitBoardStateTest(unittest.TestCase):
+    def test_same_game(self):
+        # the same seed and the same moves play the same game on both backends
+        rng = Random(2)
+        for rows, columns, n_mines in SIZES:
+            for seed in range(5):
+                model = BoardState(rows, columns, n_mines, seed=seed, safe_radius=1)
+                bits = BitBoardState(rows, columns, n_mines, seed=seed, safe_radius=1)
+                first = rng.randrange(model.size)
+                model.place_mines(first)
+                bits.place_mines(first)
+                self.assertEqual(bits.mine_indices(), model.mine_indices())
+                self.assertEqual(bytes(bits.counts), bytes(model.counts))
+                self.assertEqual(bits.bbbv, model.bbbv)
+
+                for kind, index in chain([(replay.OPEN, first)], random_moves(model, rng, 80)):
+                    self.assertEqual(sorted(play(bits, kind, index)), sorted(play(model, kind, index)))
+                    self.assertEqual((bits.lost, bits.won(), bits.n_flags, bits.closed_safe),
+                                     (model.lost, model.won(), model.n_flags, model.closed_safe))
+                self.assertEqual([bits.opened[index] for index in range(bits.size)], list(model.opened))
+
+    def test_cut_region(self):
+        # an opening region cut by flags which were removed since opens the same cells on both backends
+        models = BoardState(1, 10, 0, seed=1), BitBoardState(1, 10, 0, seed=1)
+        for model in models:
+            model.place_mines(0)
+            for kind, index in ((replay.FLAG, 3), (replay.FLAG, 6), (replay.OPEN, 0), (replay.OPEN, 4),
+                                (replay.OPEN, 9), (replay.FLAG, 3), (replay.FLAG, 6)):
+                play(model, kind, index)
+        self.assertEqual([play(model, replay.OPEN, 3) for model in models], [[3], [3]])
+        self.assertEqual([model.closed_safe for model in models], [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests of the endless board rules, across the borders of its chunks:
+root> python -m unittest test_endless
+"""
+import unittest
+from random import Random
+
+from endless import CHUNK, EndlessState
+
+
+def naive_count(model, loc: tuple[int, int]) -> int:
+    return sum(model.is_mine(*neighbor) for neighbor in model.neighbors(loc))
+
+
+def naive_reveal(model, loc: tuple[int, int]) -> set:
+    """
+    Return the cells that opening a cell opens, by a search over the closed, unflagged cells, with the hints counted
+    a cell at a time.
+    """
+    def closed(cell):
+        chunk, index = model.peek(cell)
+        return chunk is None or not (chunk.opened[index] or chunk.flagged[index])
+
+    if not closed(loc):
+        return set()
+    region, queue = {loc}, [loc]
+    while queue:
+        current = queue.pop()
+        if model.is_mine(*current) or naive_count(model, current):
+            continue
+        for neighbor in model.neighbors(current):
+            if neighbor not in region and closed(neighbor):
+                region.add(neighbor)
+                queue.append(neighbor)
+    return region
+
+
+class EndlessStateTest(unittest.TestCase):
+    def test_hints(self):
+        # the hints of the cells around the corners of a chunk count the mines of the neighboring chunks
+        for seed in range(5):
+            model = EndlessState(0.3, seed=seed)
+            model.start((0, 0))
+            for chunk_row, chunk_column in ((0, 0), (-1, 0), (0, -1), (-1, -1), (2, -3)):
+                for row in (0, 1, CHUNK - 2, CHUNK - 1):
+                    for column in range(CHUNK):
+                        loc = (chunk_row * CHUNK + row, chunk_column * CHUNK + column)
+                        chunk, index = model.chunk(loc)
+                        self.assertEqual(chunk.mines[index], model.is_mine(*loc))
+                        self.assertEqual(chunk.counts[index], naive_count(model, loc))
+                        transposed = (loc[1], loc[0])
+                        chunk, index = model.chunk(transposed)
+                        self.assertEqual(chunk.counts[index], naive_count(model, transposed))
+
+    def test_reveal(self):
+        # the opening regions cross the chunks borders, with flags and opened cells around
+        rng = Random(6)
+        for seed in range(5):
+            model = EndlessState(0.15, seed=seed)
+            first = (CHUNK - 1, -1)
+            model.start(first)
+            expected = naive_reveal(model, first)
+            self.assertEqual(set(model.reveal(first)), expected)
+            self.assertGreater(len(expected), 9)
+            for _ in range(200):
+                loc = (rng.randrange(-CHUNK, 2 * CHUNK), rng.randrange(-2 * CHUNK, CHUNK))
+                if rng.random() < 0.2:
+                    model.toggle_flag(loc)
+                    continue
+                if model.is_mine(*loc):
+                    continue
+                expected = naive_reveal(model, loc)
+                opened = model.reveal(loc)
+                self.assertEqual(len(opened), len(expected))
+                self.assertEqual(set(opened), expected)
+            self.assertFalse(model.lost)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests of the no-guess boards, and of their generation in the background:
+root> python -m unittest test_generator
+"""
+import time
+import unittest
+from multiprocessing import Value
+
+import generator
+from generator import Generator, no_guess, solvable
+from state import BoardState
+
+
+class NoGuessTest(unittest.TestCase):
+    def test_solvable(self):
+        # the options of a no-guess board reproduce a board that the solver clears with no guess
+        for rows, columns, n_mines in ((9, 9, 10), (16, 16, 40), (16, 30, 99)):
+            options = no_guess(rows, columns, n_mines, seed=rows * columns)
+            self.assertIsNotNone(options)
+            first = options.pop('first')
+            model = BoardState(rows, columns, n_mines, **options)
+            self.assertTrue(solvable(model, first))
+            self.assertTrue(model.won())
+
+    def test_min_3bv(self):
+        # a no-guess board of a challenge round is as hard as a random one: its 3BV is at least the minimum of the level
+        options = no_guess(9, 9, 10, seed=2, min_3bv=30)
+        self.assertIsNotNone(options)
+        first = options.pop('first')
+        model = BoardState(9, 9, 10, **options)
+        self.assertTrue(solvable(model, first))
+        self.assertGreaterEqual(model.bbbv, 30)
+
+    def test_cancelled(self):
+        # a job stops once its ticket is cancelled, and the later jobs don't
+        generator.cancelled = Value('q', 3)
+        try:
+            self.assertIsNone(no_guess(9, 9, 10, seed=1, ticket=3))
+            self.assertIsNotNone(no_guess(9, 9, 10, seed=1, ticket=4))
+        finally:
+            generator.cancelled = None
+
+
+class GeneratorTest(unittest.TestCase):
+    def test_take(self):
+        # a board taken before it is done is cancelled, and the single worker goes on to the next board
+        boards = Generator(attempts=10 ** 6)
+        try:
+            hard = dict(rows=30, columns=30, n_mines=300)
+            boards.request(hard)
+            future, _ = boards.futures[Generator.key(hard)]
+            while not future.running():
+                time.sleep(0.01)
+            self.assertIsNone(boards.take(hard))
+            self.assertIsNone(future.result(timeout=60))
+
+            easy = dict(rows=9, columns=9, n_mines=10)
+            boards.request(easy)
+            future, _ = boards.futures[Generator.key(easy)]
+            self.assertIsNotNone(future.result(timeout=60))
+            self.assertIsNotNone(boards.take(easy))
+        finally:
+            boards.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
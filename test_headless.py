@@ -0,0 +1,146 @@
+"""
+Headless tests of the game rules and of the tools built on them, against naive reference implementations:
+root> python -m unittest test_headless
+"""
+import unittest
+from random import Random
+
+import replay
+from state import BoardState
+
+SIZES = ((9, 9, 10), (16, 16, 40), (16, 30, 99), (5, 40, 12), (1, 12, 2), (30, 30, 60))
+
+
+def naive_counts(model) -> list:
+    """
+    Count the neighboring mines of every cell, a cell at a time.
+    """
+    counts = []
+    for row in range(model.rows):
+        for column in range(model.columns):
+            counts.append(sum(model.mines[r * model.columns + c]
+                              for r in range(max(row - 1, 0), min(row + 2, model.rows))
+                              for c in range(max(column - 1, 0), min(column + 2, model.columns))
+                              if (r, c) != (row, column)))
+    return counts
+
+
+def naive_reveal(model, index: int) -> set:
+    """
+    Return the cells that opening a cell opens, by a breadth-first search over the closed, unflagged cells.
+    """
+    if model.opened[index] or model.flagged[index]:
+        return set()
+    region, queue = {index}, [index]
+    while queue:
+        current = queue.pop()
+        if model.mines[current] or model.counts[current]:
+            continue
+        for neighbor in model.neighbors(current):
+            if neighbor not in region and not model.opened[neighbor] and not model.flagged[neighbor]:
+                region.add(neighbor)
+                queue.append(neighbor)
+    return region
+
+
+def random_moves(model, rng: Random, n: int):
+    """
+    Generate random moves (open, flag and chord) of a game in progress, as (kind, index) pairs.
+    """
+    for _ in range(n):
+        if model.lost or model.won():
+            return
+        index = rng.randrange(model.size)
+        kind = rng.choice((replay.OPEN, replay.OPEN, replay.FLAG, replay.CHORD))
+        yield kind, index
+
+
+def play(model, kind: int, index: int) -> list:
+    if kind == replay.OPEN:
+        return model.reveal(index)
+    if kind == replay.CHORD:
+        return model.chord(index)
+    flagged = model.toggle_flag(index)
+    return [] if flagged is None else [index]
+
+
+class BoardStateTest(unittest.TestCase):
+    def test_placement(self):
+        for rows, columns, n_mines in SIZES:
+            for seed in range(5):
+                model = BoardState(rows, columns, n_mines, seed=seed, safe_radius=1)
+                first = Random(seed).randrange(model.size)
+                model.place_mines(first)
+                self.assertEqual(len(model.mine_indices()), n_mines)
+                self.assertNotIn(first, model.mine_indices())
+                self.assertEqual(list(model.counts), naive_counts(model))
+
+    def test_seed(self):
+        model, other = BoardState(16, 30, 99, seed=7), BoardState(16, 30, 99, seed=7)
+        model.place_mines(100)
+        other.place_mines(100)
+        self.assertEqual(model.mine_indices(), other.mine_indices())
+
+    def test_min_3bv(self):
+        # no layout of this board reaches the minimum: the last one is kept, and its seed reproduces it
+        model = BoardState(4, 4, 3, seed=1, min_3bv=100)
+        model.place_mines(0)
+        self.assertEqual(len(model.mine_indices()), 3)
+        self.assertEqual(list(model.counts), naive_counts(model))
+        other = BoardState(4, 4, 3, seed=model.seed)
+        other.place_mines(0)
+        self.assertEqual(model.mine_indices(), other.mine_indices())
+        self.assertEqual(model.bbbv, other.bbbv)
+
+        model = BoardState(9, 9, 10, seed=3, min_3bv=20)
+        model.place_mines(40)
+        self.assertGreaterEqual(model.bbbv, 20)
+
+    def test_reveal(self):
+        # the labeled regions open exactly what a search from the cell opens, with flags and opened cells around
+        rng = Random(1)
+        for rows, columns, n_mines in SIZES:
+            for seed in range(5):
+                model = BoardState(rows, columns, n_mines, seed=seed)
+                model.place_mines(rng.randrange(model.size))
+                for kind, index in random_moves(model, rng, 60):
+                    if kind == replay.FLAG:
+                        model.toggle_flag(index)
+                    elif kind == replay.OPEN:
+                        expected = naive_reveal(model, index)
+                        opened = model.reveal(index)
+                        self.assertEqual(len(opened), len(expected))
+                        self.assertEqual(set(opened), expected)
+                self.assertEqual(model.closed_safe, sum(not model.opened[index] and not model.mines[index]
+                                                        for index in range(model.size)))
+
+        # a region cut by flags, and opened on both sides of them: once the flags are removed, a cell between them
+        # opens only the cells connected to it
+        model = BoardState(1, 10, 0, seed=1)
+        model.place_mines(0)
+        for index in (3, 6):
+            model.toggle_flag(index)
+        for index in (0, 4, 9):
+            model.reveal(index)
+        for index in (3, 6):
+            model.toggle_flag(index)
+        self.assertEqual(model.reveal(3), [3])
+        self.assertEqual(model.closed_safe, 1)
+
+    def test_3bv(self):
+        # the 3BV is the clicks of a perfect game: a click per opening region, and a click per cell out of them
+        for rows, columns, n_mines in SIZES:
+            for seed in range(5):
+                model = BoardState(rows, columns, n_mines, seed=seed)
+                model.place_mines(0)
+                clicks = 0
+                for index in sorted(range(model.size), key=lambda index: model.counts[index] > 0):
+                    if not model.mines[index] and not model.opened[index]:
+                        model.reveal(index)
+                        clicks += 1
+                self.assertTrue(model.won())
+                self.assertEqual(clicks, model.bbbv)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Tests of the undo and redo history, on random games:
+root> python -m unittest test_history
+"""
+import unittest
+from itertools import chain
+from random import Random
+
+import replay
+from history import History
+from state import BoardState
+from test_headless import SIZES, play, random_moves
+
+
+class HistoryTest(unittest.TestCase):
+    def test_undo(self):
+        # undoing all the moves closes the board again, move by move, and redoing them plays the same game
+        rng = Random(3)
+        for rows, columns, n_mines in SIZES:
+            model = BoardState(rows, columns, n_mines, seed=rows)
+            model.place_mines(0)
+            history = History()
+            positions = []
+            for kind, index in chain([(replay.OPEN, 0)], random_moves(model, rng, 40)):
+                positions.append((bytes(model.opened), bytes(model.flagged), model.lost))
+                changed = play(model, kind, index)
+                if changed:
+                    history.push(kind, index, changed)
+            end = (bytes(model.opened), bytes(model.flagged), model.lost)
+
+            while True:
+                move = history.undo()
+                if move is None:
+                    break
+                kind, index, cells = move
+                if kind == replay.FLAG:
+                    model.toggle_flag(index)
+                else:
+                    model.close(cells)
+                self.assertIn((bytes(model.opened), bytes(model.flagged), model.lost), positions)
+            self.assertFalse(any(model.opened) or any(model.flagged))
+
+            while history.next_move() is not None:
+                kind, index = history.next_move()
+                history.push(kind, index, play(model, kind, index))
+            self.assertEqual((bytes(model.opened), bytes(model.flagged), model.lost), end)
+
+
+if __name__ == '__main__':
+    unittest.main()
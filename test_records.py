@@ -0,0 +1,65 @@
+"""
+Tests of the records database, and of its migration from the records.json file of the earlier versions:
+root> python -m unittest test_records
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from records import RecordStore
+
+
+class RecordStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'records.db')
+        self.legacy = os.path.join(self.directory.name, 'records.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_migrate(self):
+        # the json records are copied once: opening the database again doesn't copy them twice
+        with open(self.legacy, 'w') as fp:
+            json.dump({'classic': {'Beginner': {'ann': 12, 'bob': 9}}, 'challenge': {'Expert': {'cat': 3}}}, fp)
+        store = RecordStore(self.path, self.legacy)
+        self.assertEqual(store.top('classic', 'Beginner'), [('bob', 9, None), ('ann', 12, None)])
+        self.assertEqual(store.best('challenge', 'Expert'), 3)
+        store.close()
+
+        store = RecordStore(self.path, self.legacy)
+        self.assertEqual(len(store.history('classic', 'Beginner')), 2)
+        store.close()
+
+    def test_top(self):
+        # the classic times are best when lower, the challenge scores when higher, and only the top ones are kept
+        store = RecordStore(self.path, self.legacy)
+        for score in (30, 10, 50, 20, 40, 60, 5):
+            store.add('classic', 'Beginner', f'c{score}', score, efficiency=1.0)
+            store.add('challenge', 'Beginner', f'h{score}', score)
+        expected_classic = [5, 10, 20, 30, 40]
+        expected_challenge = [60, 50, 40, 30, 20]
+        self.assertEqual([record[1] for record in store.top('classic', 'Beginner')], expected_classic)
+        self.assertEqual([record[1] for record in store.top('challenge', 'Beginner')], expected_challenge)
+        store.close()
+
+        # the same order is read back from the database
+        store = RecordStore(self.path, self.legacy)
+        self.assertEqual([record[1] for record in store.top('classic', 'Beginner')], expected_classic)
+        self.assertEqual([record[1] for record in store.top('challenge', 'Beginner')], expected_challenge)
+        self.assertEqual(len(store.history('classic', 'Beginner')), 7)
+        self.assertEqual(store.errors, [])
+        store.close()
+
+    def test_reset(self):
+        store = RecordStore(self.path, self.legacy)
+        store.add('classic', 'Expert', 'ann', 100)
+        store.reset()
+        self.assertEqual(store.top('classic', 'Expert'), [])
+        self.assertEqual(store.history('classic', 'Expert'), [])
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests of the replay log, against the games it recorded:
+root> python -m unittest test_replay
+"""
+import os
+import tempfile
+import unittest
+from itertools import chain
+from random import Random
+
+import replay
+from state import BoardState
+from test_headless import SIZES, play, random_moves
+
+
+class ReplayTest(unittest.TestCase):
+    def record(self, directory: str) -> tuple[str, list]:
+        """
+        Play and record a few games, and return the log path and the final positions.
+        """
+        rng = Random(4)
+        recorder = replay.Recorder()
+        recorder.open(directory)
+        positions = []
+        for rows, columns, n_mines in SIZES:
+            model = BoardState(rows, columns, n_mines, seed=rng.randrange(2 ** 32), safe_radius=1)
+            first = rng.randrange(model.size)
+            model.place_mines(first)
+            recorder.start(model)
+            for kind, index in chain([(replay.OPEN, first)], random_moves(model, rng, 60)):
+                if play(model, kind, index):
+                    recorder.event(kind, index)
+            recorder.event(replay.END, model.won())
+            positions.append((bytes(model.opened), bytes(model.flagged), model.lost, model.won()))
+        path = recorder.path
+        recorder.close()
+        return path, positions
+
+    def test_position(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path, positions = self.record(directory)
+            games = replay.read(path)
+            self.assertEqual(len(games), len(positions))
+            for events, position in zip(games, positions):
+                model = replay.Replay(events).position()
+                self.assertEqual((bytes(model.opened), bytes(model.flagged), model.lost, model.won()), position)
+
+    def test_cut_log(self):
+        # a log cut in the middle of its last event is read up to the event before it
+        with tempfile.TemporaryDirectory() as directory:
+            path, positions = self.record(directory)
+            games = replay.read(path)
+            with open(path, 'rb') as fp:
+                data = fp.read()
+            cut = os.path.join(directory, 'cut.msr')
+            with open(cut, 'wb') as fp:
+                fp.write(data[:-1])
+            cut_games = replay.read(cut)
+            self.assertEqual(cut_games[:-1], games[:-1])
+            self.assertEqual(cut_games[-1], games[-1][:-1])
+
+    def test_pause(self):
+        # the events after the end of a game aren't recorded, until the next game starts
+        with tempfile.TemporaryDirectory() as directory:
+            recorder = replay.Recorder()
+            recorder.open(directory)
+            model = BoardState(9, 9, 10, seed=1)
+            model.place_mines(0)
+            recorder.start(model)
+            recorder.event(replay.OPEN, 0)
+            recorder.event(replay.END, False)
+            recorder.pause()
+            recorder.event(replay.TICK, 1)
+            recorder.start(model)
+            recorder.event(replay.TICK, 1)
+            path = recorder.path
+            recorder.close()
+            first, second = replay.read(path)
+            self.assertEqual([event[0] for event in first], [replay.START, replay.OPEN, replay.END])
+            self.assertEqual([event[0] for event in second], [replay.START, replay.TICK])
+
+
+if __name__ == '__main__':
+    unittest.main()
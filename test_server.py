@@ -0,0 +1,80 @@
+"""
+Tests of the game server protocol, over a local TCP socket:
+root> python -m unittest test_server
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from server import MINE, Server
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = Server(database=os.path.join(self.directory.name, 'records.db'))
+        self.listener = await asyncio.start_server(self.server.handle, '127.0.0.1', 0)
+        port = self.listener.sockets[0].getsockname()[1]
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.listener.close()
+        await self.listener.wait_closed()
+        self.server.store.close()
+        self.directory.cleanup()
+
+    async def request(self, line) -> dict:
+        self.writer.write((line if isinstance(line, bytes) else json.dumps(line).encode()) + b'\n')
+        await self.writer.drain()
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 10))
+
+    async def test_game(self):
+        # a classic game played to its end by opening the cells in order: the replies tell the opened cells and the end
+        board = await self.request(dict(op='new', mode='classic', level='easy', name='bot'))
+        self.assertEqual((board['event'], board['rows'], board['columns'], board['n_mines']), ('board', 9, 9, 10))
+        size = board['rows'] * board['columns']
+
+        reply = await self.request(dict(op='open', cell=40))
+        self.assertEqual(reply['event'], 'cells')
+        # the first opened cell is never a mine
+        self.assertNotEqual(dict(reply['cells'])[40], MINE)
+        opened = {index for index, _ in reply['cells']}
+        for cell in range(size):
+            if 'over' in reply:
+                break
+            if cell not in opened:
+                reply = await self.request(dict(op='open', cell=cell))
+                opened.update(index for index, _ in reply['cells'])
+        over = reply['over']
+        self.assertEqual(len(over['mines']), 10)
+        self.assertEqual(over['won'], not any(hint == MINE for _, hint in reply['cells']))
+
+        error = await self.request(dict(op='open', cell=0))
+        self.assertEqual(error['event'], 'error')
+
+    async def test_flag(self):
+        await self.request(dict(op='new', level='normal'))
+        error = await self.request(dict(op='flag', cell=3))
+        self.assertEqual(error['event'], 'error')
+        await self.request(dict(op='open', cell=0))
+        reply = await self.request(dict(op='flag', cell=255))
+        self.assertIn(reply['flags'], ([[255, 1]], []))
+
+    async def test_errors(self):
+        # a bad request gets an error event, and the connection goes on
+        await self.request(dict(op='new', level='easy'))
+        for line in (b'{"op": "open"', dict(op='jump'), dict(op='new', level='huge'), dict(cell=3),
+                     dict(op='open', cell=81), dict(op='open', cell=-1), dict(op='open', cell=True),
+                     dict(op='open', cell=1.5), dict(op='open', cell='4'), [1, 2]):
+            reply = await self.request(line)
+            self.assertEqual(reply['event'], 'error', line)
+        reply = await self.request(dict(op='open', cell=40))
+        self.assertEqual(reply['event'], 'cells')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Tests of the solver hints, on random boards:
+root> python -m unittest test_solver
+"""
+import unittest
+from random import Random
+
+from solver import Solver
+from state import BoardState
+from test_headless import SIZES
+
+
+class SolverTest(unittest.TestCase):
+    def test_deductions(self):
+        # the solver never deduces a mine as safe nor a safe cell as a mine, and never hints a flagged cell
+        rng = Random(5)
+        for rows, columns, n_mines in SIZES:
+            for seed in range(10):
+                model = BoardState(rows, columns, n_mines, seed=seed, safe_radius=1)
+                first = rng.randrange(model.size)
+                model.place_mines(first)
+                solver = Solver(model)
+                solver.update(model.reveal(first))
+                while not model.lost and not model.won():
+                    closed = [index for index in range(model.size) if not model.opened[index]]
+                    for index in rng.sample(closed, min(2, len(closed))):
+                        if rng.random() < 0.3:
+                            model.toggle_flag(index)
+                    answer = solver.hint()
+                    self.assertTrue(all(model.mines[index] for index in solver.mines))
+                    self.assertFalse(any(model.mines[index] for index in solver.safe))
+                    if answer is None:
+                        break
+                    index, probability = answer
+                    self.assertFalse(model.flagged[index])
+                    self.assertFalse(model.opened[index])
+                    self.assertTrue(0 <= probability <= 1)
+                    if not probability:
+                        self.assertFalse(model.mines[index])
+                    solver.update(model.reveal(index))
+
+    def test_budget(self):
+        # a hint out of its enumeration budget estimates the components it didn't enumerate, and stays sound
+        model = BoardState(16, 30, 99, seed=6, safe_radius=1)
+        model.place_mines(200)
+        solver = Solver(model)
+        solver.MAX_NODES = 1
+        solver.update(model.reveal(200))
+        index, probability = solver.hint()
+        self.assertFalse(model.opened[index] or model.flagged[index])
+        self.assertFalse(any(model.mines[index] for index in solver.safe))
+        self.assertTrue(0 < probability <= 1 or not model.mines[index])
+        self.assertEqual(solver.cache, {})
+
+
+if __name__ == '__main__':
+    unittest.main()